@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+
+"""Measure how long it takes pyxis to start playing a channel
+
+pyxis runs against the stand-in server with a fake player, the time from
+Interface.play() being called to the player being started is measured.
+That covers login, the lineup, the ASX lookup and every retry on the way.
+
+Every run is a new pyxis process. The config directory is kept between
+runs, so after the first run the lineup cache and the session are used,
+unless --cold is given."""
+
+import os
+import sys
+import time
+import shutil
+import signal
+import tempfile
+import subprocess
+from optparse import OptionParser
+
+bench = os.path.dirname(os.path.abspath(__file__))
+top = os.path.join(bench, '..')
+sys.path.insert(0, os.path.join(top, 'pyxis'))
+from fixtures import channelName
+from suite import writeConfig
+import standin
+
+player = '''#!/bin/sh
+echo "spawn `date +%%s.%%N`" >> %(result)s
+echo "Starting playback..."
+exec cat > /dev/null
+'''
+
+# Runs bin/pyxis with Interface.play() noting when it was called
+bootstrap = '''
+import os, sys, time
+sys.path.insert(0, %(top)r)
+import pyxis.Interface
+play = pyxis.Interface.Interface.play
+def timedPlay(self, stream):
+    fd = open(%(result)r, 'a')
+    fd.write('play %%r\\n' %% time.time())
+    fd.close()
+    return play(self, stream)
+pyxis.Interface.Interface.play = timedPlay
+sys.argv = ['pyxis', '--quiet', %(station)r]
+execfile(%(script)r, {'__name__': '__main__'})
+'''
+
+def forget(confdir):
+    """Remove the cached lineup and session of pyxis"""
+    for name in ('lineup', 'session', 'cookies.txt'):
+        try:
+            os.unlink(os.path.join(confdir, 'pyxis', name))
+        except OSError:
+            pass
+
+def readResult(filename):
+    times = {}
+    try:
+        for line in open(filename):
+            (what, when) = line.split()
+            times[what] = float(when)
+    except IOError:
+        pass
+    return times
+
+def start(confdir, port, station, timeout):
+    """Run pyxis once, returns seconds from play() to the player or None"""
+    result = os.path.join(confdir, 'result')
+    if os.path.exists(result):
+        os.unlink(result)
+    env = dict(os.environ)
+    env['http_proxy'] = 'http://127.0.0.1:%d/' % port
+    code = bootstrap % {'top': top, 'result': result, 'station': station,
+                        'script': os.path.join(top, 'bin', 'pyxis')}
+    child = subprocess.Popen([sys.executable, '-c', code], env=env,
+                             stdin=open(os.devnull), stdout=open(os.devnull, 'w'),
+                             stderr=subprocess.STDOUT)
+    deadline = time.time() + timeout
+    times = {}
+    while time.time() < deadline and child.poll() is None:
+        times = readResult(result)
+        if 'spawn' in times:
+            break
+        time.sleep(0.01)
+    # Stop it like Ctrl+C would, so the session is saved for the next run
+    if child.poll() is None:
+        os.kill(child.pid, signal.SIGINT)
+        deadline = time.time() + 5
+        while time.time() < deadline and child.poll() is None:
+            time.sleep(0.05)
+        if child.poll() is None:
+            os.kill(child.pid, signal.SIGKILL)
+    child.wait()
+    if 'spawn' not in times or 'play' not in times:
+        return None
+    return times['spawn'] - times['play']
+
+def main():
+    parser = OptionParser(usage="Usage: %prog [OPTIONS]")
+    parser.add_option("-r", "--runs", dest="runs", type="int",
+        default=5, help="number of times to start pyxis")
+    parser.add_option("-c", "--cold", dest="cold",
+        action='store_true', default=False,
+        help="forget the lineup and session before every run")
+    parser.add_option("--station", dest="station",
+        default=channelName(7), help="station to play")
+    parser.add_option("-t", "--timeout", dest="timeout", type="float",
+        default=120, help="seconds to wait for the player to start")
+    standin.addOptions(parser)
+    (opts, args) = parser.parse_args()
+
+    confdir = tempfile.mkdtemp(prefix='pyxis-channelstart')
+    state = standin.fromOptions(opts)
+    server = standin.serve(state)
+    port = server.server_address[1]
+    os.environ['XDG_CONFIG_HOME'] = confdir
+    try:
+        script = os.path.join(confdir, 'player')
+        fd = open(script, 'w')
+        fd.write(player % {'result': os.path.join(confdir, 'result')})
+        fd.close()
+        os.chmod(script, 0755)
+        writeConfig(confdir, False, script)
+
+        times = []
+        for run in range(opts.runs):
+            if opts.cold:
+                forget(confdir)
+            elapsed = start(confdir, port, opts.station, opts.timeout)
+            if elapsed is None:
+                print 'run %d: the player was not started' % (run + 1)
+            else:
+                print 'run %d: %8.1f ms from play() to the player' % (run + 1, elapsed * 1000)
+                times.append(elapsed)
+    finally:
+        server.shutdown()
+        shutil.rmtree(confdir, True)
+
+    if times:
+        times.sort()
+        print 'median %.1f ms, best %.1f ms, worst %.1f ms' % \
+            (times[len(times) / 2] * 1000, times[0] * 1000, times[-1] * 1000)
+    print 'Requests served:'
+    print state.report()
+
+if __name__ == '__main__':
+    main()
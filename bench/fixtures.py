@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+
+"""Write the fixtures the benchmark suite runs against
+
+The pages are modelled on the pages saved by the debug log and are of the
+same size as the real ones, including the markup quirks htmlfixes is there
+for. Pages saved from the website can replace any of them, under the same
+file name, as long as the channel names still match the PAD feed."""
+
+import os
+from optparse import OptionParser
+
+directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+__first = ('Classic', 'Deep', 'Urban', 'Electric', 'Country', 'Smooth', 'Metal',
+           'Indie', 'Latin', 'Soul', 'Vintage', 'Coffee', 'Radio', 'Pop',
+           'Chill', 'Blues', 'Jazz', 'Folk', 'Hip', 'Rock')
+__second = ('Vinyl', 'Tracks', 'Nation', 'Lounge', 'Highway', 'Beats', 'Thunder',
+            'Underground', 'Hits', 'Town', 'Cafe', 'Garage', 'Spectrum', 'Area',
+            'Groove', 'Kitchen', 'Studio', 'Planet', 'Hop', 'Alley')
+
+def channelName(i):
+    """Returns the name of channel i, no name is part of another one"""
+    return '%s %s' % (__first[i % len(__first)],
+                      __second[(i / len(__first)) % len(__second)])
+
+def category(i):
+    return 'cat%d' % (i / 20)
+
+def page(title, body):
+    """Wrap body in the page layout shared by the player pages"""
+    styles = '\n'.join(['.row%d { color: #%06x; padding: %dpx; }' % (i, i * 4099, i % 7)
+                        for i in range(150)])
+    return '''<!DOCTYPE HTML PUBLIC "-//W3C//DTD HTML 4.01 Transitional//EN">
+<html><head><title>%s</title>
+<meta http-equiv="Content-Type" content="text/html; charset=iso-8859-1">
+<style type="text/css">
+%s
+</style>
+<script type="text/javascript">
+function openPlayer(url) { window.open(url, "player", "width=400,height=300"); }
+// <option value="not|a|channel">commented out</option>
+function select(i) { document.forms[0].selectedStream.value = i; }
+</script></head>
+<body><table width="100"%%" cellpadding="0" cellspacing="0">
+<tr><td><img src="/images/logo.gif" width=200 height=40 alt="SIRIUS"></td></tr>
+</table>
+%s
+<!-- NOW PLAYING TITLE:START -->
+<div class="footer">Copyright &copy; SIRIUS Satellite Radio</div>
+</body></html>
+''' % (title, styles, body)
+
+def lineup(provider, channels):
+    """Returns the body of a player page with the channel select list"""
+    options = []
+    rows = []
+    for i in range(channels):
+        if i % 20 == 0:
+            options.append('<option value="%s">-- Category %d --</option>' %
+                           (category(i), i / 20))
+        options.append('<option value="%s|genre%d|channel%d">'
+                       '&nbsp;&nbsp;%d;%s</option>' %
+                       (category(i), i / 5, i, i, channelName(i)))
+        if provider == 'usa':
+            rows.append('<tr class="row%d"><td width="100"%%">'
+                        '<a href="#" onclick="select(%d)">%s</a></td>'
+                        '<td><img src="/images/ch%d.gif" width="40"></td></tr>' %
+                        (i % 150, i, channelName(i), i))
+        else:
+            rows.append('<tr class="row%d"><td style={color:#fff} width=100>'
+                        '<a onclick=location.href="/play?c=%d">%s</a></td>'
+                        '<td width=\'40\'><img src="/images/ch%d.gif"></td></tr>' %
+                        (i % 150, i, channelName(i), i))
+    return '''<form name="player" method="post">
+<input type="hidden" name="token" value="a1b2c3d4e5">
+<select name="selectedStream" onchange="this.form.submit()">
+%s
+</select>
+</form>
+<div class="bg-now-playing-mac-large"></div>
+<table>
+%s
+</table>''' % ('\n'.join(options), '\n'.join(rows))
+
+def playing(provider):
+    """Returns the body of the page embedding the player for a stream"""
+    if provider == 'usa':
+        url = '/player/listen/asx.action?stream=channel7&token=a1b2c3d4e5'
+    else:
+        url = 'http://mp.siriuscanada.ca/sirius/ca/asx/channel7.asx?token=a1b2c3d4e5'
+    return '''<object id="MediaPlayer" classid="CLSID:22D6F312-B0F6-11D0-94AB-0080C74C7E95">
+<param name="FileName" value="%s">
+<param name="AutoStart" value="true">
+<param name="ShowControls" value="0">
+</object>''' % url
+
+def login():
+    """Returns the body of the Canada login page"""
+    return '''<form name="login" method="post" action="/sirius/ca/servlet/MediaPlayerLogin/subscriber">
+<input type="hidden" name="token" value="a1b2c3d4e5">
+<input type="hidden" name="captchaID" value="8675309">
+<input type="text" name="username"><input type="password" name="password">
+<img src="/sirius/ca/images/captcha/img_1234.jpg" width=120>
+<input type="text" name="captcha_response">
+</form>'''
+
+def asx(channel):
+    return '''<ASX version="3.0">
+<ABSTRACT>SIRIUS</ABSTRACT>
+<ENTRY>
+<REF HREF="mms://wmscr1.sirius.com/%d_hi?token=a1b2c3d4e5"/>
+<REF HREF="http://wmscr1.sirius.com:80/%d_hi?token=a1b2c3d4e5"/>
+</ENTRY>
+</ASX>
+''' % (channel, channel)
+
+def pad(channels):
+    """Returns a PAD feed with now-playing information for every channel"""
+    events = []
+    for i in range(channels):
+        events.append('''  <event>
+    <channelname>%(name)s</channelname>
+    <channelnumber>%(i)d</channelnumber>
+    <songtitle>Song title number %(i)d (Remastered)</songtitle>
+    <artist>Artist %(i)d &amp; The Band</artist>
+    <album>Album %(i)d</album>
+    <composer>Composer %(i)d</composer>
+    <starttime>2010-01-01T00:00:00</starttime>
+  </event>''' % {'i': i, 'name': channelName(i)})
+    return '<?xml version="1.0" encoding="UTF-8"?>\n<paddata>\n%s\n</paddata>\n' \
+        % '\n'.join(events)
+
+def fixtures(channels):
+    """Returns a dict of file name to contents of every fixture"""
+    return {
+        'usa-player.html': page('SIRIUS Player', lineup('usa', channels)),
+        'usa-login.html': page('SIRIUS Player', '<div>Welcome back</div>'),
+        'usa-playing.html': page('SIRIUS Player', playing('usa')),
+        'usa-asx.txt': 'http://www.sirius.com/player/listen/channel7.asx?token=a1b2c3d4e5',
+        'canada-login.html': page('Sirius Canada', login()),
+        'canada-player.html': page('Sirius Canada', lineup('canada', channels)),
+        'canada-playing.html': page('Sirius Canada', playing('canada')),
+        'captcha.jpg': '\xff\xd8\xff\xe0' + '\0' * 4000 + '\xff\xd9',
+        'stream.asx': asx(7),
+        'pad.xml': pad(channels * 2),
+        }
+
+def main():
+    parser = OptionParser(usage="Usage: %prog [OPTIONS]")
+    parser.add_option("-c", "--channels", dest="channels", type="int",
+        default=200, help="number of channels in the lineup")
+    parser.add_option("-f", "--force", dest="force",
+        action='store_true', default=False,
+        help="replace fixtures that exist already")
+    (opts, args) = parser.parse_args()
+
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    for (name, data) in sorted(fixtures(opts.channels).items()):
+        filename = os.path.join(directory, name)
+        if os.path.exists(filename) and not opts.force:
+            continue
+        fd = open(filename, 'wb')
+        fd.write(data)
+        fd.close()
+        print 'Wrote %s, %d bytes' % (filename, len(data))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+
+"""Compare reading the channel list with BeautifulSoup and the extractor
+
+Saved player pages can be given with --usa and --canada, otherwise pages
+with the same layout and quirks as the real ones are generated. Both ways
+have to return the same streams for the timing to be printed."""
+
+import os
+import sys
+import time
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'pyxis'))
+import htmlfixes
+from StreamList import extractStreams, soupStreams
+
+def makePage(provider, channels):
+    """Build a player page of provider with the given channel count"""
+    rows = []
+    options = []
+    for i in range(channels):
+        category = 'cat%d' % (i / 20)
+        if i % 20 == 0:
+            options.append('<option value="%s">-- Category %d --</option>' %
+                           (category, i / 20))
+        options.append('<option value="%s|genre%d|channel%d">'
+                       '&nbsp;&nbsp;Channel %d;Channel Name %d</option>' %
+                       (category, i / 5, i, i, i))
+        if provider == 'usa':
+            rows.append('<tr><td width="100"%%" class="row">'
+                        '<a href="#" onclick="select(%d)">Channel %d</a></td>'
+                        '<td><img src="logo%d.gif" width="40"></td></tr>' %
+                        (i, i, i))
+        else:
+            rows.append('<tr><td style={color:#fff} width=100>'
+                        '<a onclick=location.href="/play?c=%d">Channel %d</a>'
+                        '</td><td width=\'40\'>logo</td></tr>' % (i, i))
+    return '''<html><head><title>Player</title>
+<script type="text/javascript">
+function select(i) { document.forms[0].selectedStream.value = i; }
+</script></head><body>
+<form name="player" method="post">
+<select name="selectedStream" onchange="this.form.submit()">
+%s
+</select>
+</form>
+<table>
+%s
+</table>
+</body></html>
+''' % ('\n'.join(options), '\n'.join(rows))
+
+
+def measure(name, parser, page, runs):
+    start = time.time()
+    for i in range(runs):
+        streams = parser(page)
+    elapsed = time.time() - start
+    print '  %-12s %8.2f ms per page' % (name, elapsed * 1000 / runs)
+    return streams
+
+def compare(provider, page, runs):
+    print '%s page, %d bytes' % (provider, len(page))
+    sanitize = htmlfixes.sanitizer(provider)
+    soupParse = lambda data: soupStreams(sanitize(data))
+    soup = measure('soup', soupParse, page, runs)
+    fast = measure('extractor', extractStreams, page, runs)
+    if soup != fast:
+        print '  The parsers disagree, %d and %d streams' % (len(soup), len(fast))
+        return False
+    print '  %d streams, same result' % len(fast)
+    return True
+
+def main():
+    parser = OptionParser(usage="Usage: %prog [OPTIONS]")
+    parser.add_option("--usa", dest="usa", metavar="FILE",
+        help="saved USA player page")
+    parser.add_option("--canada", dest="canada", metavar="FILE",
+        help="saved Canada player page")
+    parser.add_option("-c", "--channels", dest="channels", type="int",
+        default=200, help="number of channels in generated pages")
+    parser.add_option("-r", "--runs", dest="runs", type="int",
+        default=20, help="number of runs to average over")
+    (opts, args) = parser.parse_args()
+
+    same = True
+    for provider in ('usa', 'canada'):
+        filename = getattr(opts, provider)
+        if filename:
+            page = open(filename).read()
+        else:
+            page = makePage(provider, opts.channels)
+        same = compare(provider, page, opts.runs) and same
+    if not same:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+"""Compare the streaming now-playing parser with the old minidom parser
+
+Each parser runs in its own child process so that the peak memory reported
+for it is not polluted by the other one."""
+
+import os
+import sys
+import time
+from StringIO import StringIO
+from optparse import OptionParser
+from xml.dom.minidom import parse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'pyxis'))
+from NowPlaying import parseNowPlaying
+
+def makeFeed(channels):
+    """Build a pad_provider.jsp style document with the given channel count"""
+    events = []
+    for i in range(channels):
+        events.append('''  <event>
+    <channelname>Channel %(i)d</channelname>
+    <channelnumber>%(i)d</channelnumber>
+    <songtitle>Song title number %(i)d (Remastered)</songtitle>
+    <artist>Artist %(i)d &amp; The Band</artist>
+    <album>Album %(i)d</album>
+    <composer>Composer %(i)d</composer>
+    <starttime>2010-01-01T00:00:00</starttime>
+  </event>''' % {'i': i})
+    return '<?xml version="1.0" encoding="UTF-8"?>\n<paddata>\n%s\n</paddata>\n' \
+        % '\n'.join(events)
+
+def minidomParse(source, channel=None):
+    """The now-playing parser pyxis used before parseNowPlaying"""
+    nowplaying = {}
+    sirius_xml = parse(source)
+    for channels in sirius_xml.getElementsByTagName('event'):
+        channel = channels.getElementsByTagName('channelname')[0].firstChild.data
+        song = channels.getElementsByTagName('songtitle')[0].firstChild.data
+        artist = channels.getElementsByTagName('artist')[0].firstChild.data
+        nowplaying[str(channel).strip().lower()] = {'artist': artist, 'song': song}
+    sirius_xml.unlink()
+    return nowplaying
+
+def measure(name, parser, feed, polls, channel):
+    """Run parser polls times in a child process and print its cost"""
+    (rfd, wfd) = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(rfd)
+        start = time.time()
+        for i in range(polls):
+            parser(StringIO(feed), channel)
+        os.write(wfd, repr(time.time() - start))
+        os._exit(0)
+
+    os.close(wfd)
+    elapsed = float(os.read(rfd, 64))
+    os.close(rfd)
+    (pid, status, usage) = os.wait4(pid, 0)
+    cpu = usage.ru_utime + usage.ru_stime
+    print '%-20s %8.2f ms wall %8.2f ms cpu per poll, peak rss %6d KB' % \
+        (name, elapsed * 1000 / polls, cpu * 1000 / polls, usage.ru_maxrss)
+
+def main():
+    parser = OptionParser(usage="Usage: %prog [OPTIONS]")
+    parser.add_option("-c", "--channels", dest="channels", type="int",
+        default=400, help="number of channels in the feed")
+    parser.add_option("-p", "--polls", dest="polls", type="int",
+        default=50, help="number of polls to average over")
+    (opts, args) = parser.parse_args()
+
+    feed = makeFeed(opts.channels)
+    middle = 'channel %d' % (opts.channels / 2)
+    print 'Feed of %d channels, %d bytes' % (opts.channels, len(feed))
+    measure('minidom', minidomParse, feed, opts.polls, None)
+    measure('streaming', parseNowPlaying, feed, opts.polls, None)
+    measure('streaming, early', parseNowPlaying, feed, opts.polls, middle)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,329 @@
+#!/usr/bin/env python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+
+"""A local stand-in for the Sirius websites
+
+Serves the login, lineup, player, ASX and PAD endpoints of the USA and
+Canada sites from the files in bench/fixtures, with sessions, so pyxis can
+run end to end without going to the real websites. Point pyxis at it by
+setting http_proxy, requests for any host are answered.
+
+Latency, server errors, dropped connections, expiring sessions and the
+"too many logins" page can be injected to see how pyxis copes with them."""
+
+import os
+import sys
+import time
+import random
+import socket
+import threading
+import urlparse
+import cgi
+import md5
+import BaseHTTPServer
+import SocketServer
+from optparse import OptionParser
+
+from fixtures import directory
+
+expired = '''<html><head><title>SIRIUS Login</title></head>
+<body>Your session has expired, please log in again.</body></html>
+'''
+
+toomany = '''<html><head><title>SIRIUS Login</title></head>
+<body><img src="/images/Sorry_Pg3.gif">
+We are unable to log you in, there have been too many logins today.</body></html>
+'''
+
+class StandIn(object):
+    """State and fault settings shared by the request handlers
+
+    latency: seconds every response is delayed
+    jitter: up to this many seconds are added to the latency at random
+    errors: fraction of requests answered with 503
+    drops: fraction of requests whose connection is closed without answer
+    sessionttl: seconds a login lasts, 0 for ever
+    maxlogins: logins allowed before the "too many logins" page, 0 for
+    no limit"""
+
+    def __init__(self, latency=0, jitter=0, errors=0, drops=0, sessionttl=0,
+                 maxlogins=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.errors = errors
+        self.drops = drops
+        self.sessionttl = sessionttl
+        self.maxlogins = maxlogins
+        self.logins = 0
+        self.sessions = {}
+        self.counts = {}
+        self.lock = threading.Lock()
+        self.__fixtures = {}
+
+    def fixture(self, name):
+        if name not in self.__fixtures:
+            fd = open(os.path.join(directory, name), 'rb')
+            self.__fixtures[name] = fd.read()
+            fd.close()
+        return self.__fixtures[name]
+
+    def count(self, what):
+        self.lock.acquire()
+        try:
+            self.counts[what] = self.counts.get(what, 0) + 1
+        finally:
+            self.lock.release()
+
+    def newSession(self):
+        """Returns the id of a new session that is not logged in"""
+        session = md5.new('%f %f' % (time.time(), random.random())).hexdigest()[:16]
+        self.lock.acquire()
+        try:
+            self.sessions[session] = None
+        finally:
+            self.lock.release()
+        return session
+
+    def login(self, session):
+        """Log session in, returns False if there were too many logins"""
+        self.lock.acquire()
+        try:
+            if self.maxlogins and self.logins >= self.maxlogins:
+                return False
+            self.logins += 1
+            self.sessions[session] = time.time()
+            return True
+        finally:
+            self.lock.release()
+
+    def loggedIn(self, session):
+        started = self.sessions.get(session)
+        if started is None:
+            return False
+        return not self.sessionttl or time.time() - started < self.sessionttl
+
+    def report(self):
+        """Returns the request counts as text"""
+        lines = ['%6d %s' % (count, what) for (what, count) in sorted(self.counts.items())]
+        lines.append('%6d logins' % self.logins)
+        return '\n'.join(lines)
+
+class StandInHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    verbose = False
+
+    def do_GET(self):
+        self.respond()
+
+    def do_POST(self):
+        self.respond()
+
+    def do_HEAD(self):
+        self.respond()
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            BaseHTTPServer.BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    def respond(self):
+        standin = self.server.standin
+        url = urlparse.urlsplit(self.path)
+        self.host = url.netloc or self.headers.get('Host', '')
+        self.route = url.path
+        self.query = url.query
+        self.form = {}
+        self.cookie = None
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.form = dict([(k, v[0]) for (k, v) in
+                              cgi.parse_qs(self.rfile.read(length)).items()])
+        for header in self.headers.getheaders('Cookie'):
+            for part in header.split(';'):
+                (name, sep, value) = part.strip().partition('=')
+                if name == 'JSESSIONID':
+                    self.cookie = value
+
+        delay = standin.latency + standin.jitter * random.random()
+        if delay:
+            time.sleep(delay)
+        if random.random() < standin.drops:
+            standin.count('dropped')
+            self.close_connection = 1
+            return
+        if random.random() < standin.errors:
+            standin.count('errors')
+            self.send(503, 'Service Unavailable\n', 'text/plain')
+            return
+
+        if 'siriuscanada' in self.host:
+            self.canada(standin)
+        else:
+            self.usa(standin)
+
+    def usa(self, standin):
+        route = self.route
+        if route.endswith('pad_provider.jsp'):
+            standin.count('pad')
+            self.sendFeed(standin.fixture('pad.xml'))
+        elif route.endswith('siriushome.action'):
+            standin.count('home')
+            self.send(200, expired, session=standin.newSession())
+        elif 'siriuslogin.action' in route:
+            standin.count('login')
+            session = self.cookie or route.partition('jsessionid=')[2]
+            if not standin.login(session):
+                self.send(200, toomany)
+            else:
+                self.send(200, standin.fixture('usa-login.html'))
+        elif route.endswith('play.action'):
+            standin.count('play %s' % self.command)
+            if not standin.loggedIn(self.cookie):
+                self.send(200, expired)
+            elif self.command == 'POST' and 'channelKey' in self.form:
+                self.send(200, standin.fixture('usa-playing.html'))
+            else:
+                self.send(200, standin.fixture('usa-player.html'))
+        elif route.endswith('asx.action'):
+            standin.count('asx')
+            self.send(200, standin.fixture('usa-asx.txt'), 'text/plain')
+        elif route.endswith('.asx'):
+            standin.count('stream')
+            self.send(200, standin.fixture('stream.asx'), 'video/x-ms-asf')
+        else:
+            standin.count('not found')
+            self.send(404, 'Not Found\n', 'text/plain')
+
+    def canada(self, standin):
+        route = self.route
+        session = self.cookie
+        if session is None:
+            session = standin.newSession()
+        if '/img_' in route:
+            standin.count('captcha')
+            self.send(200, standin.fixture('captcha.jpg'), 'image/jpeg', session)
+        elif 'MediaPlayerLogin' in route:
+            standin.count('login')
+            if not standin.login(session):
+                self.send(200, toomany, session=session)
+            else:
+                self.send(200, standin.fixture('canada-player.html'), session=session)
+        elif route.endswith('MediaPlayer'):
+            standin.count('player %s' % self.command)
+            if not standin.loggedIn(session):
+                self.send(200, standin.fixture('canada-login.html'), session=session)
+            elif self.form.get('activity') in ('selectStream', 'selectBitrate'):
+                self.send(200, standin.fixture('canada-playing.html'), session=session)
+            else:
+                self.send(200, standin.fixture('canada-player.html'), session=session)
+        elif route.endswith('.asx'):
+            standin.count('stream')
+            self.send(200, standin.fixture('stream.asx'), 'video/x-ms-asf', session)
+        else:
+            standin.count('not found')
+            self.send(404, 'Not Found\n', 'text/plain')
+
+    def sendFeed(self, data):
+        """Send the feed, or 304 if the client has the same version"""
+        etag = '"%s"' % md5.new(data).hexdigest()
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send(200, data, 'text/xml', headers={'ETag': etag})
+
+    def send(self, code, data, type='text/html', session=None, headers={}):
+        self.send_response(code)
+        self.send_header('Content-Type', type)
+        self.send_header('Content-Length', str(len(data)))
+        if session:
+            self.send_header('Set-Cookie', 'JSESSIONID=%s; Path=/' % session)
+        for (name, value) in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(data)
+
+class StandInServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, standin):
+        BaseHTTPServer.HTTPServer.__init__(self, address, StandInHandler)
+        self.standin = standin
+
+    def handle_error(self, request, client_address):
+        # Clients going away in the middle of a request are expected
+        if not isinstance(sys.exc_info()[1], socket.error):
+            BaseHTTPServer.HTTPServer.handle_error(self, request, client_address)
+
+def serve(standin, port=0):
+    """Start serving in a background thread, returns the server
+
+    The port the server listens on is server.server_address[1]."""
+    server = StandInServer(('127.0.0.1', port), standin)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.setDaemon(True)
+    thread.start()
+    return server
+
+def addOptions(parser):
+    """Add the fault injection options to an OptionParser"""
+    parser.add_option("--latency", dest="latency", type="float",
+        default=0, help="seconds every response is delayed")
+    parser.add_option("--jitter", dest="jitter", type="float",
+        default=0, help="up to this many seconds are added to the latency")
+    parser.add_option("--errors", dest="errors", type="float",
+        default=0, help="fraction of requests answered with an error")
+    parser.add_option("--drops", dest="drops", type="float",
+        default=0, help="fraction of connections closed without an answer")
+    parser.add_option("--session-ttl", dest="sessionttl", type="float",
+        default=0, help="seconds a login lasts, 0 for ever")
+    parser.add_option("--max-logins", dest="maxlogins", type="int",
+        default=0, help="logins allowed before 'too many logins', 0 for no limit")
+
+def fromOptions(opts):
+    return StandIn(opts.latency, opts.jitter, opts.errors, opts.drops,
+                   opts.sessionttl, opts.maxlogins)
+
+def main():
+    parser = OptionParser(usage="Usage: %prog [OPTIONS]")
+    parser.add_option("-p", "--port", dest="port", type="int",
+        default=8080, help="port to listen on")
+    parser.add_option("-v", "--verbose", dest="verbose",
+        action='store_true', default=False, help="log every request")
+    addOptions(parser)
+    (opts, args) = parser.parse_args()
+
+    StandInHandler.verbose = opts.verbose
+    standin = fromOptions(opts)
+    server = serve(standin, opts.port)
+    print 'Serving on port %d, run pyxis with http_proxy=http://127.0.0.1:%d/' % \
+        (opts.port, opts.port)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    print
+    print standin.report()
+
+if __name__ == '__main__':
+    main()
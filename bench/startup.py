@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+
+"""Measure how long pyxis takes to start
+
+Import time is the time to import the entry point module, cold start is the
+time from running bin/pyxis until it writes its first byte of output. Every
+run is a new process so nothing is cached in memory between runs.
+
+Commands that need the network, like --list, also measure the login and
+lineup fetch unless the lineup is cached and the session still valid."""
+
+import os
+import sys
+import time
+import signal
+import subprocess
+from optparse import OptionParser
+
+top = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+script = os.path.join(top, 'bin', 'pyxis')
+
+# Modules that should only be loaded when they are needed
+heavy = ['BeautifulSoup', 'readline', 'IPython', 'sqlite3',
+         'pyxis.ProviderUSA', 'pyxis.ProviderCanada', 'pyxis.Recorder']
+
+probe = '''
+import sys, time
+start = time.time()
+from pyxis.Interface import Interface
+elapsed = time.time() - start
+print elapsed, len(sys.modules), ','.join([m for m in %r if m in sys.modules])
+''' % heavy
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) / 2]
+
+def importTime(runs):
+    """Returns (seconds, module count, heavy modules loaded) of the import"""
+    times = []
+    for i in range(runs):
+        child = subprocess.Popen([sys.executable, '-c', probe], cwd=top,
+                                 stdout=subprocess.PIPE)
+        (elapsed, modules, loaded) = (child.communicate()[0].split() + [''])[:3]
+        times.append(float(elapsed))
+    return (median(times), int(modules), loaded)
+
+def coldStart(args, runs, timeout):
+    """Returns the seconds until bin/pyxis args writes its first output"""
+    times = []
+    for i in range(runs):
+        start = time.time()
+        child = subprocess.Popen([sys.executable, script] + args,
+                                 stdin=open(os.devnull),
+                                 stdout=subprocess.PIPE,
+                                 stderr=subprocess.STDOUT)
+        signal.alarm(timeout)
+        try:
+            child.stdout.read(1)
+            times.append(time.time() - start)
+        finally:
+            signal.alarm(0)
+            if child.poll() is None:
+                os.kill(child.pid, signal.SIGTERM)
+            child.wait()
+    return median(times)
+
+def timedOut(signum, frame):
+    raise IOError('timed out')
+
+def main():
+    parser = OptionParser(usage="Usage: %prog [OPTIONS] [-- COMMAND...]")
+    parser.add_option("-r", "--runs", dest="runs", type="int",
+        default=5, help="number of runs to take the median of")
+    parser.add_option("-t", "--timeout", dest="timeout", type="int",
+        default=60, help="seconds to wait for a command's first output")
+    parser.add_option("-b", "--budget", dest="budget", type="float",
+        default=0, help="fail if importing takes more milliseconds than this")
+    (opts, commands) = parser.parse_args()
+    if not commands:
+        commands = ['--help', '--history', '--list']
+    signal.signal(signal.SIGALRM, timedOut)
+
+    (elapsed, modules, loaded) = importTime(opts.runs)
+    print '%-20s %8.1f ms, %d modules' % ('import', elapsed * 1000, modules)
+    if loaded:
+        print '%-20s %s' % ('loaded eagerly', loaded.replace(',', ', '))
+
+    for command in commands:
+        try:
+            first = coldStart(command.split(), opts.runs, opts.timeout)
+            print '%-20s %8.1f ms to first output' % (command, first * 1000)
+        except IOError, err:
+            print '%-20s %s' % (command, err)
+
+    if opts.budget and elapsed * 1000 > opts.budget:
+        print 'Import time is over the budget of %.1f ms' % opts.budget
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+
+"""Offline benchmark of the parsing pyxis does on provider pages and feeds
+
+Every operation runs against the files in bench/fixtures, served to the
+real Sirius and provider code by a urllib2 handler so nothing goes over
+the network. Run bench/fixtures.py first to create them, pages saved from
+the website can replace the generated ones.
+
+Each operation runs in its own child process. The time is the average
+over the runs, the memory is how much the peak RSS grew during the first
+run. A digest of the result is kept with the baseline so a change in what
+is parsed shows up as well as a change in speed. Baselines are only
+comparable on the machine they were saved on."""
+
+import os
+import sys
+import md5
+import json
+import time
+import shutil
+import tempfile
+import resource
+import urllib2
+import httplib
+import ConfigParser
+from StringIO import StringIO
+from optparse import OptionParser
+
+bench = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(bench, '..', 'pyxis'))
+from fixtures import directory
+from Config import reloadConfig
+from Transport import makeResponse
+from Retry import RetryPolicy
+from StreamCapture import asxRefs
+import htmlfixes
+
+baselinefile = os.path.join(bench, 'baseline.json')
+
+def fixture(name):
+    fd = open(os.path.join(directory, name), 'rb')
+    try:
+        return fd.read()
+    finally:
+        fd.close()
+
+class FixtureHandler(urllib2.BaseHandler):
+    """Answers requests with fixtures instead of going to the website
+
+    routes is a list of (method, url part, fixture name), the first route
+    matching a request is used."""
+    handler_order = 100
+
+    def __init__(self, routes=()):
+        self.routes = list(routes)
+
+    def http_open(self, req):
+        url = req.get_full_url()
+        for (method, part, name) in self.routes:
+            if method == req.get_method() and part in url:
+                headers = httplib.HTTPMessage(StringIO(
+                    'Content-Type: text/html\r\n'
+                    'Set-Cookie: JSESSIONID=bench; Path=/\r\n\r\n'))
+                return makeResponse(fixture(name), headers, url, 200, 'OK')
+        raise urllib2.URLError('no fixture for %s %s' % (req.get_method(), url))
+
+def writeConfig(confdir, canada, command='true', settings={}):
+    """Write a config for the benchmark account and load it
+
+    command: the media player
+    settings: options for the settings section"""
+    config = ConfigParser.SafeConfigParser()
+    sections = {
+        'account': {'username': 'bench', 'password': md5.new('bench').hexdigest(),
+                    'login_type': 'subscriber', 'canada': str(canada)},
+        'settings': dict({'bitrate': 'High', 'notifications': 'No'}, **settings),
+        'mediaplayer': {'command': command, 'options': '', 'record': ''},
+        'recordings': {'directory': confdir},
+        'debug': {'debug': 'False', 'directory': confdir},
+        }
+    for (section, options) in sections.items():
+        config.add_section(section)
+        for (option, value) in options.items():
+            config.set(section, option, value)
+    if not os.path.isdir(os.path.join(confdir, 'pyxis')):
+        os.makedirs(os.path.join(confdir, 'pyxis'))
+    fd = open(os.path.join(confdir, 'pyxis', 'pyxisrc'), 'w')
+    config.write(fd)
+    fd.close()
+    reloadConfig()
+
+def makeSirius(confdir, canada):
+    """Returns a Sirius for the provider whose requests go to fixtures, its
+    lineup loaded from the player page, the handler and a stream"""
+    from Sirius import Sirius
+    from StreamList import extractStreams
+    writeConfig(confdir, canada,
+                settings={'nowplaying_ttl': '3600', 'retry_attempts': '1'})
+    sirius = Sirius()
+    handler = FixtureHandler()
+    sirius.addHandler(handler)
+    sirius.retry = RetryPolicy(1, verbose=False)
+    # The lineup is needed to select a stream and match channels
+    sirius.allstreams = extractStreams(fixture('%s-player.html' %
+                                               (canada and 'canada' or 'usa')))
+    return (sirius, handler, sirius.allstreams[8])
+
+class Operation(object):
+    """A benchmarked operation
+
+    routes are installed in handler before run is called, soup tells
+    whether it needs BeautifulSoup"""
+
+    def __init__(self, name, run, handler=None, routes=(), soup=False):
+        self.name = name
+        self.run = run
+        self.handler = handler
+        self.routes = routes
+        self.soup = soup
+
+    def prepare(self):
+        if self.handler is not None:
+            self.handler.routes = list(self.routes)
+
+def operations(confdir):
+    """Returns the list of benchmarked operations"""
+    ops = []
+    for provider in ('usa', 'canada'):
+        ops.append(Operation('sanitize %s' % provider,
+                             lambda s=htmlfixes.sanitizer(provider),
+                                    d=fixture('%s-player.html' % provider): s(d)))
+
+    (usa, handler, stream) = makeSirius(confdir, False)
+    ops.append(Operation('login usa', lambda: usa.provider.auth(probe=False),
+        handler, [('GET', 'siriushome.action', 'usa-login.html'),
+                  ('POST', 'siriuslogin.action', 'usa-login.html')]))
+    ops.append(Operation('lineup usa', usa.provider.tryGetStreams,
+        handler, [('GET', 'play.action', 'usa-player.html')]))
+    ops.append(Operation('asx usa', lambda s=stream: usa.provider.tryGetAsxURL(s),
+        handler, [('POST', 'play.action', 'usa-playing.html'),
+                  ('GET', 'asx.action', 'usa-asx.txt')], True))
+    ops.append(Operation('nowplaying feed', lambda: usa.getNowPlaying(),
+        handler, [('GET', 'pad_provider.jsp', 'pad.xml')]))
+    ops.append(Operation('nowplaying match', lambda: matchAll(usa),
+        handler, [('GET', 'pad_provider.jsp', 'pad.xml')]))
+
+    (canada, handler, stream) = makeSirius(confdir, True)
+    canada.provider._ProviderCanada__captchaCallback = lambda filename: 'rc3k'
+    ops.append(Operation('login canada', canada.provider.auth,
+        handler, [('GET', 'img_', 'captcha.jpg'),
+                  ('GET', 'MediaPlayer', 'canada-login.html'),
+                  ('POST', 'MediaPlayerLogin', 'canada-player.html')], True))
+    ops.append(Operation('lineup canada', canada.provider.tryGetStreams,
+        handler, [('GET', 'MediaPlayer', 'canada-player.html')]))
+    ops.append(Operation('asx canada', lambda s=stream: canada.provider.tryGetAsxURL(s),
+        handler, [('POST', 'MediaPlayer', 'canada-playing.html')], True))
+
+    ops.append(Operation('asx refs', lambda d=fixture('stream.asx'): asxRefs(d)))
+    return ops
+
+def matchAll(sirius):
+    """Look up what plays on every tenth stream of the lineup"""
+    playing = []
+    for stream in sirius.allstreams[::10]:
+        nowplaying = sirius.nowPlaying(stream['longName'])
+        playing.append((nowplaying['longName'], nowplaying['playing']))
+    return playing
+
+def measure(op, runs):
+    """Run op in a child process, returns (ms per run, peak KB, digest)"""
+    (rfd, wfd) = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(rfd)
+        try:
+            op.prepare()
+            before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            result = op.run()
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+            start = time.time()
+            for i in range(runs):
+                op.run()
+            elapsed = time.time() - start
+            report = {'ms': elapsed * 1000 / runs, 'kb': peak,
+                      'digest': md5.new(repr(result)).hexdigest()}
+        except Exception, err:
+            report = {'error': '%s: %s' % (err.__class__.__name__, err)}
+        os.write(wfd, json.dumps(report))
+        os._exit(0)
+
+    os.close(wfd)
+    data = ''
+    while True:
+        chunk = os.read(rfd, 4096)
+        if not chunk:
+            break
+        data += chunk
+    os.close(rfd)
+    os.waitpid(pid, 0)
+    if not data:
+        return {'error': 'the benchmark process died'}
+    return json.loads(data)
+
+def loadBaseline():
+    try:
+        fd = open(baselinefile)
+        try:
+            return json.load(fd)
+        finally:
+            fd.close()
+    except (IOError, ValueError):
+        return {}
+
+def compare(name, result, baseline, tolerance):
+    """Print result next to its baseline, returns False for a regression"""
+    if 'error' in result:
+        print '%-18s %s' % (name, result['error'])
+        return False
+    base = baseline.get(name)
+    if base is None:
+        print '%-18s %9.2f ms %7d KB   no baseline' % (name, result['ms'], result['kb'])
+        return True
+
+    change = (result['ms'] - base['ms']) / base['ms'] * 100
+    notes = []
+    # Ignore changes too small to measure reliably
+    if change > tolerance and result['ms'] - base['ms'] > 0.05:
+        notes.append('SLOWER')
+    if result['kb'] > base['kb'] * (1 + tolerance / 100.0) + 64:
+        notes.append('MORE MEMORY')
+    if result['digest'] != base['digest']:
+        notes.append('RESULT CHANGED')
+    print '%-18s %9.2f ms %7d KB %+7.1f%% %s' % (name, result['ms'], result['kb'],
+                                              change, ' '.join(notes))
+    return not notes
+
+def main():
+    parser = OptionParser(usage="Usage: %prog [OPTIONS] [OPERATION]...")
+    parser.add_option("-r", "--runs", dest="runs", type="int",
+        default=20, help="number of runs to average over")
+    parser.add_option("-t", "--tolerance", dest="tolerance", type="float",
+        default=25, help="percent an operation may be slower than the baseline")
+    parser.add_option("-s", "--save", dest="save",
+        action='store_true', default=False,
+        help="save the results as the new baseline")
+    (opts, names) = parser.parse_args()
+
+    if not os.path.exists(os.path.join(directory, 'pad.xml')):
+        print 'No fixtures in %s, run bench/fixtures.py first' % directory
+        sys.exit(1)
+    try:
+        import BeautifulSoup
+        soup = True
+    except ImportError:
+        soup = False
+
+    confdir = tempfile.mkdtemp(prefix='pyxis-bench')
+    os.environ['XDG_CONFIG_HOME'] = confdir
+    cwd = os.getcwd()
+    # The Canada login saves the captcha in the current directory
+    os.chdir(confdir)
+    try:
+        baseline = loadBaseline()
+        results = {}
+        ok = True
+        for op in operations(confdir):
+            if names and op.name not in names:
+                continue
+            if op.soup and not soup:
+                print '%-18s skipped, BeautifulSoup is not installed' % op.name
+                continue
+            results[op.name] = measure(op, opts.runs)
+            ok = compare(op.name, results[op.name], baseline, opts.tolerance) and ok
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(confdir, True)
+
+    if opts.save:
+        baseline.update([(name, result) for (name, result) in results.items()
+                         if 'error' not in result])
+        fd = open(baselinefile, 'w')
+        json.dump(baseline, fd, indent=1, sort_keys=True, separators=(',', ': '))
+        fd.write('\n')
+        fd.close()
+        print 'Saved the baseline to %s' % baselinefile
+    elif not ok:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+import time
+import threading
+from Debug import log
+
+class AsxCache(object):
+    """In memory cache of the ASX urls of streams
+
+    Urls are kept per channel and bitrate for ttl seconds. When a validate
+    function is given a cached url is only returned if validate(url) is
+    True, an invalid url is dropped from the cache."""
+
+    def __init__(self, ttl, validate=None):
+        """ttl: seconds a url is used
+        validate: optional function checking that a url still works"""
+        self.ttl = ttl
+        self.validate = validate
+        self.__urls = {}
+        self.__lock = threading.Lock()
+
+    def key(self, stream, bitrate):
+        return (stream['channelKey'], bitrate.lower())
+
+    def get(self, stream, bitrate):
+        """Returns the cached url of stream at bitrate or None"""
+        key = self.key(stream, bitrate)
+        self.__lock.acquire()
+        try:
+            entry = self.__urls.get(key)
+        finally:
+            self.__lock.release()
+        if entry is None:
+            return None
+        (url, fetched) = entry
+        if time.time() - fetched >= self.ttl:
+            self.invalidate(stream, bitrate)
+            return None
+        if self.validate is not None and not self.validate(url):
+            log('Cached url of %s is no longer valid', key[0])
+            self.invalidate(stream, bitrate)
+            return None
+        return url
+
+    def put(self, stream, bitrate, url):
+        """Remember url as the url of stream at bitrate"""
+        self.__lock.acquire()
+        try:
+            self.__urls[self.key(stream, bitrate)] = (url, time.time())
+        finally:
+            self.__lock.release()
+
+    def invalidate(self, stream=None, bitrate=None):
+        """Forget the url of stream at bitrate, or every url if no stream
+        is given"""
+        self.__lock.acquire()
+        try:
+            if stream is None:
+                self.__urls = {}
+            else:
+                self.__urls.pop(self.key(stream, bitrate), None)
+        finally:
+            self.__lock.release()
@@ -0,0 +1,88 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+import os
+import time
+import json
+from Debug import log
+
+class AuthCache(object):
+    """Remembers which session was last known to be logged in and when
+
+    The cache is kept on disk so a session validated by one run of pyxis is
+    trusted by the next one, as long as it is not older than maxage. A
+    request failing with a trusted session is followed by a probe instead
+    of a login."""
+
+    def __init__(self, filename, maxage):
+        """filename: file the session state is kept in
+        maxage: seconds a validated session is trusted"""
+        self.filename = filename
+        self.maxage = maxage
+        self.session = None
+        self.validated = 0
+        self.__written = 0
+
+        try:
+            fd = open(filename)
+            try:
+                state = json.load(fd)
+            finally:
+                fd.close()
+            self.session = state['session']
+            self.validated = state['validated']
+            self.__written = self.validated
+        except (IOError, ValueError, KeyError, TypeError):
+            pass
+
+    def valid(self, session):
+        """Returns True if session was validated less than maxage ago"""
+        return bool(session) and session == self.session and \
+            time.time() - self.validated < self.maxage
+
+    def record(self, session):
+        """Remember that session is logged in as of now"""
+        if not session:
+            return
+        now = time.time()
+        changed = session != self.session
+        self.session = session
+        self.validated = now
+        # A session in constant use would otherwise be rewritten every request
+        if changed or now - self.__written > self.maxage / 2:
+            self.__save()
+
+    def invalidate(self):
+        """Forget the validated session"""
+        if self.session is None:
+            return
+        log('Session %s is no longer valid', self.session)
+        self.session = None
+        self.validated = 0
+        self.__save()
+
+    def __save(self):
+        tmpfile = '%s.%d' % (self.filename, os.getpid())
+        fd = open(tmpfile, 'w')
+        try:
+            json.dump({'session': self.session, 'validated': self.validated}, fd)
+        finally:
+            fd.close()
+        os.chmod(tmpfile, 0600)
+        os.rename(tmpfile, self.filename)
+        self.__written = self.validated
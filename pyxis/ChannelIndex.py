@@ -0,0 +1,81 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+import re
+
+__nonword = re.compile(r'\W')
+
+def normalize(name):
+    """Remove all non letter characters so names can be compared"""
+    return __nonword.sub('', name.strip().lower())
+
+class ChannelIndex(object):
+    """Maps stream names to the channel names used by the now-playing feed
+
+    A stream matches a channel when their normalized names are equal, when
+    an alias names the channel, or when the normalized stream name is part
+    of the normalized channel name. If several channels contain the stream
+    name the shortest one wins, ties go to the alphabetically first."""
+
+    def __init__(self, channels, aliases=None):
+        """channels: lower case channel names from the now-playing feed
+        aliases: dictionary of stream name to channel name"""
+        self.channels = frozenset(channels)
+        self.__keys = {}
+        for channel in sorted(self.channels):
+            self.__keys.setdefault(normalize(channel), channel)
+        # Shortest first so the first substring hit is the best one
+        self.__candidates = sorted(self.__keys.items(),
+                                   key=lambda item: (len(item[0]), item[0]))
+
+        self.__aliases = {}
+        for (stream, channel) in (aliases or {}).items():
+            channel = channel.strip().lower()
+            if channel in self.channels:
+                self.__aliases[normalize(stream)] = channel
+
+        self.__resolved = {}
+
+    def precompute(self, streams):
+        """Resolve all of the given stream names ahead of time"""
+        for stream in streams:
+            self.resolve(stream)
+
+    def resolve(self, stream):
+        """Returns the channel name for stream, or None if nothing matches"""
+        try:
+            return self.__resolved[stream]
+        except KeyError:
+            pass
+
+        key = normalize(stream)
+        if stream in self.channels:
+            channel = stream
+        elif key in self.__aliases:
+            channel = self.__aliases[key]
+        elif key in self.__keys:
+            channel = self.__keys[key]
+        else:
+            channel = None
+            for (candidate, name) in self.__candidates:
+                if key in candidate:
+                    channel = name
+                    break
+
+        self.__resolved[stream] = channel
+        return channel
@@ -21,6 +21,7 @@ import sys
 import ConfigParser
 import getpass
 import hashlib
+import threading
 
 class ConfigError(Exception):
     def __init__(self, attr):
@@ -31,13 +32,22 @@ class ConfigError(Exception):
  again to repair the config file.' % self.attr
 
 class Section(object):
+    """The options of a config section as read only attributes"""
     def __init__(self, options):
-        for (option, value) in options:
-            setattr(self, option, value);
+        self.__dict__.update(options)
 
     def __getattr__(self, attr):
         raise ConfigError(attr)
 
+    def __setattr__(self, attr, value):
+        raise TypeError('Config options are read only, %s can not be set' % attr)
+
+    def get(self, option, default=None):
+        """Returns the value of option, or default if it is not set
+
+        Used for optional settings that older config files may not have."""
+        return self.__dict__.get(option, default)
+
 class Config(object):
     """Config is responsible for reading the config file
 
@@ -53,30 +63,28 @@ class Config(object):
         Takes no parameters and is essentiall read only thus multiple
         copies of Config can be taken as identical."""
 
-        try:
-            confdir = os.environ['XDG_CONFIG_HOME']
-        except:
-            confdir = '%s/.config' % os.environ['HOME']
-
-        self.confpath = os.path.join(confdir, 'pyxis')
+        self.confpath = confPath()
         self.conffile = os.path.join(self.confpath, 'pyxisrc')
 
+        self.config = ConfigParser.SafeConfigParser()
+        self.config.read(self.conffile)
+        self.read()
+
+        if not self.validate():
+            self.create()
+
+    def read(self):
+        """Map the sections of the ConfigParser to member variables"""
         # Config Sections
         self.account = None
         self.settings = None
         self.mediaplayer = None
 
-        self.config = ConfigParser.SafeConfigParser()
-        self.config.read(self.conffile)
-
         sections = self.config.sections()
         for section in sections:
             items = self.config.items(section)
             setattr(self, section, Section(items))
 
-        if not self.validate():
-            self.create()
-
     def validate(self):
         """Validate that the current config file works with this version.
         Returns True if the config is valid, else False.
@@ -146,12 +154,34 @@ class Config(object):
         self.config.set('account', 'login_type', login_type)
         self.config.set('account', 'canada', canada)
         self.config.set('settings', 'bitrate', bitrate)
+        self.config.set('settings', 'lineup_ttl', '86400')
+        self.config.set('settings', 'lineup_recheck', '300')
+        self.config.set('settings', 'nowplaying_ttl', '15')
+        self.config.set('settings', 'auth_probe_age', '900')
+        self.config.set('settings', 'cookie_flush_interval', '5')
+        self.config.set('settings', 'retry_attempts', '8')
+        self.config.set('settings', 'retry_delay', '0.5')
+        self.config.set('settings', 'retry_max_delay', '30')
+        self.config.set('settings', 'prefetch', 'Yes')
+        self.config.set('settings', 'asx_ttl', '300')
+        self.config.set('settings', 'asx_validate', 'No')
+        self.config.set('settings', 'prefetch_count', '5')
+        self.config.set('settings', 'favorites', '')
+        self.config.set('settings', 'daemon_address', '127.0.0.1')
+        self.config.set('settings', 'daemon_port', '8018')
+        self.config.set('settings', 'daemon_cache', '10')
         self.config.set('mediaplayer', 'command', '/usr/bin/mplayer')
         self.config.set('mediaplayer', 'options', player_options)
         self.config.set('mediaplayer', 'record', '-ao pcm:file=')
+        self.config.set('mediaplayer', 'persistent', 'Yes')
+        self.config.set('mediaplayer', 'standby', '0')
         self.config.set('recordings', 'directory', os.environ['HOME'] + '/pyxis/')
+        self.config.set('recordings', 'native', 'False')
         self.config.set('debug', 'debug', 'False')
         self.config.set('debug', 'directory', '~/pyxisdebug')
+        self.config.set('debug', 'level', 'debug')
+        self.config.set('debug', 'log_size', '1048576')
+        self.config.set('debug', 'artifact_size', '5242880')
         try:
             import pynotify
         except:
@@ -160,6 +190,7 @@ class Config(object):
             self.config.set('settings', 'notifications', 'Yes')
 
         self.write()
+        self.read()
 
     def cryptPassword(self, password):
         """Convert the plaintext password to its md5 equivalent
@@ -187,6 +218,54 @@ www.sirius.com	FALSE	/	FALSE		sirius_login_type	subscriber
         fd.write(cookiepuss)
         fd.close()
 
+__config = None
+__stamp = None
+__lock = threading.Lock()
+
+def confPath():
+    """Returns the directory pyxis keeps its files in"""
+    try:
+        confdir = os.environ['XDG_CONFIG_HOME']
+    except:
+        confdir = '%s/.config' % os.environ['HOME']
+    return os.path.join(confdir, 'pyxis')
+
+def __fileStamp():
+    try:
+        stat = os.stat(os.path.join(confPath(), 'pyxisrc'))
+    except OSError:
+        return None
+    return (stat.st_mtime, stat.st_size)
+
+def getConfig():
+    """Returns the Config shared by the whole process
+
+    The config file is only parsed again when its modification time or
+    size changed since it was last read."""
+    global __config, __stamp
+    __lock.acquire()
+    try:
+        stamp = __fileStamp()
+        if __config is None or stamp is None or stamp != __stamp:
+            __config = Config()
+            __stamp = __fileStamp()
+        return __config
+    finally:
+        __lock.release()
+
+def reloadConfig():
+    """Parse the config file again, returns the new shared Config
+
+    Objects keep the sections they already looked up, they have to call
+    getConfig() again to see the new settings."""
+    global __stamp
+    __lock.acquire()
+    try:
+        __stamp = None
+    finally:
+        __lock.release()
+    return getConfig()
+
 def toBool(string):
     """Function that converts a string representation of a bool to a bool
 
@@ -0,0 +1,445 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+import cgi
+import json
+import signal
+import socket
+import threading
+import time
+import traceback
+import urlparse
+import BaseHTTPServer
+import SocketServer
+from Config import getConfig, reloadConfig
+from Debug import log, cleanDebug, WARNING
+from EventLoop import EventLoop
+from Player import Player
+
+class ResponseCache(object):
+    """JSON responses kept in memory for ttl seconds
+
+    A fresh response is returned without taking any lock. A missing or
+    expired one is built by one thread while the others asking for the same
+    key wait, so a burst of clients costs a single build. Building one key
+    doesn't hold up the others."""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.__responses = {}
+        self.__building = {}
+        self.__lock = threading.Lock()
+
+    def get(self, key, build):
+        """Returns the response cached as key, calling build() for the
+        object to encode if there is none"""
+        response = self.__fresh(key)
+        if response is not None:
+            return response
+
+        lock = self.__keyLock(key)
+        lock.acquire()
+        try:
+            # Another thread may have built it while we were waiting
+            response = self.__fresh(key)
+            if response is None:
+                response = json.dumps(build())
+                self.__responses[key] = (response, time.time())
+            return response
+        finally:
+            lock.release()
+
+    def __fresh(self, key):
+        entry = self.__responses.get(key)
+        if entry is not None and time.time() - entry[1] < self.ttl:
+            return entry[0]
+        return None
+
+    def __keyLock(self, key):
+        self.__lock.acquire()
+        try:
+            return self.__building.setdefault(key, threading.Lock())
+        finally:
+            self.__lock.release()
+
+    def invalidate(self):
+        self.__responses = {}
+
+class RequestError(Exception):
+    """A request that can't be served, code is the HTTP status"""
+    def __init__(self, code, message):
+        Exception.__init__(self, message)
+        self.code = code
+
+class ControlHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Answers the requests of the control API with JSON
+
+    GET  /status              the station and whether it is playing
+    GET  /list                the channel lineup
+    GET  /nowplaying          what every channel plays
+    GET  /nowplaying?station= what one station plays
+    POST /play?station=       play a station, also read from the body
+    POST /stop                stop playing
+    POST /reload              read the config file again
+
+    A POST must be sent as application/json, the body is an optional JSON
+    object of parameters. Browsers don't send that type to another site
+    without asking it first, so a web page can't control the daemon:
+
+    curl -H 'Content-Type: application/json' -d '{"station": "octane"}' \\
+        http://127.0.0.1:8018/play"""
+
+    # (method, path): (daemon method, required parameters, optional ones)
+    routes = {
+        ('GET', '/status'): ('status', (), ()),
+        ('GET', '/list'): ('list', (), ()),
+        ('GET', '/nowplaying'): ('nowPlaying', (), ('station',)),
+        ('POST', '/play'): ('play', ('station',), ()),
+        ('POST', '/stop'): ('stop', (), ()),
+        ('POST', '/reload'): ('reload', (), ()),
+    }
+
+    def do_GET(self):
+        self.respond()
+
+    def do_POST(self):
+        self.respond()
+
+    def log_message(self, format, *args):
+        log('Control request from %s: %s', self.client_address[0],
+            format % args)
+
+    def respond(self):
+        url = urlparse.urlsplit(self.path)
+        params = dict([(k, v[0]) for (k, v) in cgi.parse_qs(url.query).items()])
+        route = url.path.rstrip('/')
+        try:
+            if self.command == 'POST':
+                params.update(self.body())
+            data = self.call(self.routes.get((self.command, route)), route,
+                             params)
+        except RequestError, err:
+            self.send(err.code, json.dumps({'error': str(err)}))
+        except Exception, err:
+            log('Control request %s failed: %s', self.path, err, level=WARNING)
+            self.send(500, json.dumps({'error': str(err)}))
+        else:
+            self.send(200, data)
+
+    def body(self):
+        """The parameters sent in the body of a POST"""
+        type = self.headers.get('Content-Type', '').split(';')[0].strip()
+        if type.lower() != 'application/json':
+            raise RequestError(415, 'Requests must be sent as application/json')
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            params = json.loads(self.rfile.read(length))
+        except ValueError:
+            raise RequestError(400, 'Invalid JSON body')
+        if not isinstance(params, dict) or \
+                [v for v in params.values() if not isinstance(v, basestring)]:
+            raise RequestError(400, 'The body must be an object of strings')
+        return params
+
+    def call(self, handler, route, params):
+        """Call the daemon method of a route with the parameters it takes"""
+        if handler is None:
+            if [r for r in self.routes if r[1] == route]:
+                raise RequestError(405, 'Method not allowed')
+            raise RequestError(404, 'No such resource')
+        (method, required, optional) = handler
+        args = {}
+        for name in required + optional:
+            if name in params:
+                args[name] = params[name]
+            elif name in required:
+                raise RequestError(400, 'Missing parameter: %s' % name)
+        return getattr(self.server.daemon, method)(**args)
+
+    def send(self, code, data):
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+class ControlServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, daemon):
+        BaseHTTPServer.HTTPServer.__init__(self, address, ControlHandler)
+        self.daemon = daemon
+
+    def handle_error(self, request, client_address):
+        log('Control request from %s failed:\n%s', client_address[0],
+            traceback.format_exc(), level=WARNING)
+
+class ControlDaemon(object):
+    """Plays stations as told by clients of a local HTTP API
+
+    One Sirius session and one Player are shared by every client. The
+    lineup and now playing answers come from a ResponseCache, the player is
+    watched and what plays is polled from the main thread like in
+    interactive mode. SIGHUP or POST /reload read the config file again.
+
+    The daemon lock only guards the player and the station, Sirius
+    serializes its own requests. Nothing that can wait for the website
+    holds the daemon lock, so /status and /stop always answer quickly."""
+
+    def __init__(self, sirius, player, opts):
+        """sirius: an authenticated Sirius instance
+        player: the Player to play with
+        opts: command line options"""
+        self.sirius = sirius
+        self.player = player
+        self.options = opts
+        self.stream = None
+        self.started = 0
+        self.failures = 0
+        self.retryAt = 0
+        self.loop = None
+        self.server = None
+        self.__reload = False
+        self.__starting = False
+        self.__lock = threading.RLock()
+        self.configure()
+
+    def configure(self):
+        """Read the daemon settings"""
+        settings = getConfig().settings
+        self.address = (settings.get('daemon_address', '127.0.0.1'),
+                        int(settings.get('daemon_port', 8018)))
+        self.cache = ResponseCache(float(settings.get('daemon_cache', 10)))
+
+    def run(self, station=None):
+        """Serve clients until Ctrl+C is pressed or SIGTERM is received
+
+        station: optional station to start playing"""
+        if station is not None:
+            self.play(station)
+        try:
+            self.server = ControlServer(self.address, self)
+        except socket.error, err:
+            print "Cannot listen on %s:%d: %s" % (self.address + (err,))
+            return
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.setDaemon(True)
+        thread.start()
+        print "Listening on http://%s:%d/" % self.server.server_address[:2]
+
+        self.loop = EventLoop()
+        signal.signal(signal.SIGHUP, self.onHangup)
+        signal.signal(signal.SIGTERM, self.onTerminate)
+        self.loop.callEvery(1, self.watchPlayer)
+        self.loop.callEvery(10, self.checkStandby)
+        self.loop.callEvery(float(getConfig().settings.get('poll_interval', 30)),
+                            self.pollNowPlaying)
+        try:
+            self.loop.run()
+        except KeyboardInterrupt:
+            pass
+        self.server.server_close()
+        self.close()
+
+    def onHangup(self, signum, frame):
+        # The lock may be held right now, the watcher does the reload
+        self.__reload = True
+
+    def onTerminate(self, signum, frame):
+        self.loop.stop()
+
+    def watchPlayer(self):
+        """Start the player if a station is selected but not playing
+
+        A player that fails right away or a url that can't be fetched is
+        tried again after a delay that doubles with every failure in a row,
+        up to 30 seconds."""
+        if self.__reload:
+            self.reload()
+        now = time.time()
+        self.__lock.acquire()
+        try:
+            if self.stream is None or self.__starting or now < self.retryAt:
+                return
+            if self.player.playing():
+                if now - self.started > 5:
+                    self.failures = 0
+                return
+            stream = self.stream
+            if self.started and now - self.started < 5:
+                # The player failed right away, the url may have expired
+                self.sirius.invalidateAsxURL(stream)
+                self.backOff('Player failed')
+                return
+            self.__starting = True
+        finally:
+            self.__lock.release()
+
+        try:
+            url = self.sirius.getAsxURL(stream)
+        except Exception, err:
+            url = None
+            reason = 'Getting the url of %s failed: %s' % (stream['longName'], err)
+
+        self.__lock.acquire()
+        try:
+            self.__starting = False
+            if url is None:
+                self.backOff(reason)
+            elif self.stream is stream and not self.player.playing():
+                self.player.play(url, stream['longName'])
+                self.started = time.time()
+        finally:
+            self.__lock.release()
+
+    def checkStandby(self):
+        """Close the standby players whose stream stopped"""
+        self.__lock.acquire()
+        try:
+            if self.player.limit:
+                self.player.checkStandby()
+        finally:
+            self.__lock.release()
+
+    def backOff(self, reason):
+        """Count a failure to play and delay the next try, call with the
+        daemon lock held"""
+        self.failures += 1
+        delay = min(30, 2 ** (self.failures - 1))
+        log('%s, %d failures in a row, trying again in %ds', reason,
+            self.failures, delay, level=WARNING)
+        self.retryAt = time.time() + delay
+        self.started = 0
+
+    def pollNowPlaying(self):
+        """Keep the history of the station playing"""
+        stream = self.stream
+        if stream is not None:
+            playing = self.sirius.nowPlaying(stream['longName'])
+            if playing['new']:
+                log('Now playing %s', playing['logfmt'])
+
+    def status(self):
+        self.__lock.acquire()
+        try:
+            station = None
+            playing = False
+            if self.stream is not None:
+                station = self.stream['longName']
+                playing = self.player.playing()
+            return json.dumps({'station': station, 'playing': playing,
+                               'standby': self.player.standby()})
+        finally:
+            self.__lock.release()
+
+    def list(self):
+        return self.cache.get('list', self.__lineup)
+
+    def __lineup(self):
+        streams = self.sirius.getStreams()
+        return [{'longName': s['longName'], 'channelKey': s['channelKey'],
+                 'genreKey': s['genreKey'], 'categoryKey': s['categoryKey']}
+                for s in streams]
+
+    def nowPlaying(self, station=None):
+        if station is None:
+            return self.cache.get('nowplaying', self.__channels)
+        stream = self.__find(station)
+        return self.cache.get(('nowplaying', stream['longName']),
+                              lambda: self.__station(stream['longName']))
+
+    def __channels(self):
+        channels = self.sirius.getNowPlaying()
+        if channels == "FAILURE":
+            raise RequestError(503, 'Now playing is not available')
+        return channels
+
+    def __station(self, longName):
+        # Only the station playing is added to the history, by pollNowPlaying
+        (channel, song, artist) = self.sirius.lookupNowPlaying(longName)
+        if channel is None:
+            return {'station': longName, 'channel': None, 'song': None,
+                    'artist': None}
+        return {'station': longName, 'channel': channel.title(),
+                'song': song, 'artist': artist}
+
+    def __find(self, station):
+        stream = self.sirius.findStream(station.lower().strip())
+        if stream is None:
+            raise RequestError(404, 'Invalid station name: %s' % station)
+        return stream
+
+    def play(self, station):
+        """Select station and start playing it"""
+        stream = self.__find(station)
+        self.__lock.acquire()
+        try:
+            log('Play %s', stream['longName'])
+            if self.stream is not None:
+                self.player.stop(True)
+            self.stream = stream
+            self.started = 0
+            self.failures = 0
+            self.retryAt = 0
+        finally:
+            self.__lock.release()
+        self.watchPlayer()
+        return self.status()
+
+    def stop(self):
+        self.__lock.acquire()
+        try:
+            if self.stream is not None:
+                log('Stop %s', self.stream['longName'])
+                self.player.stop()
+            self.stream = None
+        finally:
+            self.__lock.release()
+        return self.status()
+
+    def reload(self):
+        """Read the config file again, a new player is started with the
+        new media player settings and Sirius uses the new settings and
+        aliases, see Sirius.configure. A new account, address or poll
+        interval is only used when the daemon is started again."""
+        self.__lock.acquire()
+        try:
+            self.__reload = False
+            log('Reloading the configuration')
+            reloadConfig()
+            cleanDebug()
+            self.sirius.configure()
+            self.configure()
+            self.player.close()
+            self.player = Player(self.options)
+            self.started = 0
+            self.retryAt = 0
+        finally:
+            self.__lock.release()
+        self.watchPlayer()
+        return self.status()
+
+    def close(self):
+        self.__lock.acquire()
+        try:
+            self.player.close()
+        finally:
+            self.__lock.release()
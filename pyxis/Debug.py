@@ -16,47 +16,60 @@
 #along with this program; if not, write to the Free Software
 #Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 
-from Config import Config, toBool
+from Config import getConfig, toBool
 import os
-from shutil import rmtree
+import atexit
+import logging
+import logging.handlers
+import threading
+import Queue
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+ERROR = logging.ERROR
+
+__dir = None
+__debug = None
+__logger = None
+__artifacts = None
 
 def logfile(file, data):
-    """Log data to file"""
+    """Log data to file
+
+    The file is written by a background thread into the debug directory,
+    which is kept under a configurable size by removing the oldest files."""
 
     if not __debugging():
         return
 
-    filename = os.path.join(__debugDir(), file)
-    dbfd = open(filename, 'w')
-    dbfd.write(data)
-    dbfd.close()
+    __artifacts.put((file, data))
+
+def log(msg, *args, **kwargs):
+    """Append msg % args to the debug.log file
 
-def log(data):
-    """Append data to debug.log file"""
+    msg is only formatted when debugging is on and level, DEBUG unless
+    given as a keyword, is not filtered out by the configured level."""
 
     if not __debugging():
         return
 
-    filename = os.path.join(__debugDir(), 'debug.log')
-    dbfd = open(filename, 'a')
-    dbfd.write('%s\n' % data)
-    dbfd.close()
+    __logger.log(kwargs.get('level', DEBUG), msg, *args)
 
 def cleanDebug():
-    """Remove old debug information"""
+    """Forget the debug settings so they are read again, and trim old
+    debug information down to the configured size"""
     global __dir, __debug
     __dir = None
     __debug = None
-    try:
-        rmtree(__debugDir())
-    except:
-        pass
+    if __debugging():
+        __artifacts.put(None)
 
 def __debugDir():
     global __dir
 
     if __dir == None:
-        config = Config()
+        config = getConfig()
         settings = config.debug
         __dir = settings.directory
         __dir = os.path.expanduser(__dir)
@@ -69,7 +82,93 @@ def __debugDir():
 def __debugging():
     global __debug
     if __debug == None:
-        config = Config()
+        config = getConfig()
         __debug = toBool(config.debug.debug)
+        if __debug:
+            __setup(config.debug)
 
     return __debug
+
+def __setup(settings):
+    """Create the logger and artifact writer on first use"""
+    global __logger, __artifacts
+    directory = __debugDir()
+
+    if __logger is None:
+        filename = os.path.join(directory, 'debug.log')
+        target = logging.handlers.RotatingFileHandler(filename,
+                        maxBytes=int(settings.get('log_size', 1048576)),
+                        backupCount=2)
+        target.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        # Write in batches, but errors right away
+        handler = logging.handlers.MemoryHandler(100, ERROR, target)
+        __logger = logging.getLogger('pyxis')
+        __logger.propagate = False
+        __logger.addHandler(handler)
+    level = settings.get('level', 'debug').upper()
+    __logger.setLevel(getattr(logging, level, DEBUG))
+
+    if __artifacts is None:
+        __artifacts = ArtifactWriter(directory,
+                        int(settings.get('artifact_size', 5242880)))
+        __artifacts.start()
+        atexit.register(__artifacts.close)
+
+class ArtifactWriter(threading.Thread):
+    """Writes debug files in the background
+
+    After each file the directory is trimmed to maxsize bytes by removing
+    the files that were written longest ago. debug.log and its backups are
+    rotated by the logger and left alone."""
+
+    def __init__(self, directory, maxsize):
+        threading.Thread.__init__(self)
+        self.setDaemon(True)
+        self.directory = directory
+        self.maxsize = maxsize
+        self.__queue = Queue.Queue()
+
+    def put(self, item):
+        """Queue a (file, data) tuple to be written, None just trims"""
+        self.__queue.put(item)
+
+    def close(self):
+        """Write what is queued and stop"""
+        self.__queue.put(False)
+        self.join(5)
+
+    def run(self):
+        while True:
+            item = self.__queue.get()
+            if item is False:
+                return
+            try:
+                if item is not None:
+                    self.__write(item[0], item[1])
+                self.__trim()
+            except (IOError, OSError):
+                pass
+
+    def __write(self, file, data):
+        dbfd = open(os.path.join(self.directory, file), 'w')
+        try:
+            dbfd.write(data)
+        finally:
+            dbfd.close()
+
+    def __trim(self):
+        files = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if name.startswith('debug.log'):
+                continue
+            path = os.path.join(self.directory, name)
+            stat = os.stat(path)
+            files.append((stat.st_mtime, path, stat.st_size))
+            total += stat.st_size
+
+        files.sort()
+        while total > self.maxsize and files:
+            (mtime, path, size) = files.pop(0)
+            os.unlink(path)
+            total -= size
@@ -0,0 +1,114 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+import errno
+import heapq
+import itertools
+import select
+import time
+
+class Timer(object):
+    """A scheduled call, returned so that it can be cancelled"""
+    def __init__(self, callback, args, interval=None):
+        self.callback = callback
+        self.args = args
+        self.interval = interval
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+class EventLoop(object):
+    """Runs timers and reacts to readable files from a single thread
+
+    Callbacks run one at a time in the loop, so they must not block for
+    long. Exceptions raised by a callback stop the loop and propagate out
+    of run()."""
+
+    def __init__(self):
+        self.__timers = []
+        self.__readers = {}
+        self.__sequence = itertools.count()
+        self.__running = False
+
+    def callLater(self, delay, callback, *args):
+        """Call callback with args once after delay seconds"""
+        timer = Timer(callback, args)
+        self.__schedule(delay, timer)
+        return timer
+
+    def callEvery(self, interval, callback, *args):
+        """Call callback with args right away and every interval seconds"""
+        timer = Timer(callback, args, interval)
+        self.__schedule(0, timer)
+        return timer
+
+    def addReader(self, fileobj, callback, *args):
+        """Call callback with args whenever fileobj is readable"""
+        self.__readers[fileobj.fileno()] = (fileobj, callback, args)
+
+    def removeReader(self, fileobj):
+        try:
+            del self.__readers[fileobj.fileno()]
+        except (KeyError, ValueError):
+            # ValueError is raised by closed files, find them by object
+            for (fd, reader) in self.__readers.items():
+                if reader[0] is fileobj:
+                    del self.__readers[fd]
+
+    def stop(self):
+        """Make run() return once the current callback is done"""
+        self.__running = False
+
+    def run(self):
+        """Run callbacks until stop() is called"""
+        self.__running = True
+        while self.__running:
+            timeout = None
+            if self.__timers:
+                timeout = max(0, self.__timers[0][0] - time.time())
+            if not self.__readers and timeout is None:
+                break
+
+            try:
+                (readable, w, x) = select.select(self.__readers.keys(), [], [],
+                                                 timeout)
+            except select.error, err:
+                if err.args[0] == errno.EINTR:
+                    continue
+                raise
+
+            for fd in readable:
+                if not self.__running:
+                    return
+                reader = self.__readers.get(fd)
+                if reader is not None:
+                    reader[1](*reader[2])
+
+            now = time.time()
+            while self.__running and self.__timers and self.__timers[0][0] <= now:
+                timer = heapq.heappop(self.__timers)[2]
+                if timer.cancelled:
+                    continue
+                if timer.interval is not None:
+                    self.__schedule(timer.interval, timer)
+                timer.callback(*timer.args)
+
+    def __schedule(self, delay, timer):
+        heapq.heappush(self.__timers,
+                       (time.time() + delay, self.__sequence.next(), timer))
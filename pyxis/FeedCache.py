@@ -0,0 +1,107 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+import urllib2
+import gzip
+import time
+import threading
+from StringIO import StringIO
+from Debug import log
+
+class FeedCache(object):
+    """Caches the response of a single URL
+
+    Callers within ttl seconds of the last fetch get the cached document.
+    After that the document is revalidated with If-None-Match and
+    If-Modified-Since so an unchanged feed costs a 304 instead of the whole
+    document. Only one fetch is ever in flight, callers that arrive while
+    one is running wait for it and share its result."""
+
+    def __init__(self, url, ttl, headers=None, opener=urllib2.urlopen):
+        """url: url of the document to cache
+        ttl: number of seconds a fetched document is served without asking
+        headers: dictionary of extra request headers
+        opener: function that opens a urllib2.Request"""
+        self.url = url
+        self.ttl = ttl
+        self.headers = headers or {}
+        self.opener = opener
+
+        self.data = None
+        self.version = 0
+        self.fetched = 0
+        self.__etag = None
+        self.__modified = None
+        self.__lock = threading.Lock()
+
+    def fresh(self):
+        """Returns True if the cached document can be served as is"""
+        return self.data is not None and time.time() - self.fetched < self.ttl
+
+    def get(self):
+        """Returns a tuple of the document and its version
+
+        The version changes every time a different document is fetched."""
+        if not self.fresh():
+            self.__lock.acquire()
+            try:
+                # Another caller may have fetched while we were waiting
+                if not self.fresh():
+                    self.__fetch()
+            finally:
+                self.__lock.release()
+        return (self.data, self.version)
+
+    def invalidate(self):
+        """Make the next get fetch the document"""
+        self.fetched = 0
+
+    def __fetch(self):
+        req = urllib2.Request(self.url, None, self.headers)
+        req.add_header('Accept-Encoding', 'gzip')
+        if self.data is not None:
+            if self.__etag:
+                req.add_header('If-None-Match', self.__etag)
+            if self.__modified:
+                req.add_header('If-Modified-Since', self.__modified)
+
+        try:
+            handle = self.opener(req)
+        except urllib2.HTTPError, e:
+            if e.code == 304 and self.data is not None:
+                log('%s not modified', self.url)
+                self.fetched = time.time()
+                return
+            raise
+
+        try:
+            data = handle.read()
+            info = handle.info()
+        finally:
+            handle.close()
+
+        if info.get('Content-Encoding') == 'gzip':
+            data = gzip.GzipFile(fileobj=StringIO(data)).read()
+
+        log('Fetched %d bytes from %s', len(data), self.url)
+        self.__etag = info.get('ETag')
+        self.__modified = info.get('Last-Modified')
+        self.fetched = time.time()
+        if data != self.data:
+            self.data = data
+            self.version += 1
@@ -0,0 +1,165 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+import re
+import time
+import sqlite3
+import threading
+from Debug import log
+
+# Lines of the old playlist file: "10 01|31 23:59 Channel Name: Song, Artist"
+__playlistLine = re.compile(r'^(\d\d \d\d\|\d\d \d\d:\d\d) (.*?): (.*)$')
+
+def parsePlaylistLine(line):
+    """Returns a (time, channel, artist, title) tuple for a line of the old
+    playlist file, or None for lines without song information"""
+    match = __playlistLine.match(line.strip())
+    if not match:
+        return None
+    (stamp, channel, playing) = match.groups()
+    if channel == 'ERROR' or ', ' not in playing:
+        return None
+    (title, artist) = playing.rsplit(', ', 1)
+    when = time.mktime(time.strptime(stamp, '%y %m|%d %H:%M'))
+    return (when, channel, artist, title)
+
+class History(object):
+    """Now-playing history kept in an SQLite database
+
+    Plays are queued in memory and inserted in batches, once batch plays are
+    waiting or interval seconds after the last insert. Call flush() before
+    exiting to write the rest."""
+
+    SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS plays (
+        id INTEGER PRIMARY KEY,
+        time REAL NOT NULL,
+        channel TEXT COLLATE NOCASE,
+        artist TEXT COLLATE NOCASE,
+        title TEXT COLLATE NOCASE
+    );
+    CREATE INDEX IF NOT EXISTS plays_time ON plays (time);
+    CREATE INDEX IF NOT EXISTS plays_channel ON plays (channel, time);
+    CREATE INDEX IF NOT EXISTS plays_artist ON plays (artist, time);
+    CREATE INDEX IF NOT EXISTS plays_title ON plays (title, time);
+    '''
+
+    def __init__(self, filename, batch=20, interval=60):
+        """filename: the database file, created if it does not exist
+        batch: number of queued plays that triggers an insert
+        interval: seconds after which queued plays are inserted anyway"""
+        self.filename = filename
+        self.batch = batch
+        self.interval = interval
+        self.__pending = []
+        self.__flushed = time.time()
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(filename, check_same_thread=False)
+        self.__db.executescript(self.SCHEMA)
+
+    def add(self, when, channel, artist, title):
+        """Queue a play for insertion"""
+        self.__lock.acquire()
+        try:
+            self.__pending.append((when, channel, artist, title))
+            due = len(self.__pending) >= self.batch or \
+                time.time() - self.__flushed >= self.interval
+        finally:
+            self.__lock.release()
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Insert all queued plays"""
+        self.__lock.acquire()
+        try:
+            if self.__pending:
+                self.__db.executemany('INSERT INTO plays (time, channel, artist, title) '
+                                      'VALUES (?, ?, ?, ?)', self.__pending)
+                self.__db.commit()
+                log('Saved %d plays to history', len(self.__pending))
+                self.__pending = []
+            self.__flushed = time.time()
+        finally:
+            self.__lock.release()
+
+    def search(self, channel=None, artist=None, title=None, since=None,
+               limit=20):
+        """Find plays, most recent first
+
+        channel, artist, title: case insensitive patterns, % matches any text
+        since: only plays after this time
+        limit: maximum number of plays returned
+
+        returns: list of (time, channel, artist, title) tuples"""
+        self.flush()
+        where = []
+        args = []
+        for (column, pattern) in (('channel', channel), ('artist', artist),
+                                  ('title', title)):
+            if pattern is None:
+                continue
+            # Equality lets SQLite use the index for both filter and order
+            if '%' in pattern:
+                where.append('%s LIKE ?' % column)
+            else:
+                where.append('%s = ?' % column)
+            args.append(pattern)
+        if since is not None:
+            where.append('time >= ?')
+            args.append(since)
+
+        query = 'SELECT time, channel, artist, title FROM plays'
+        if where:
+            query = query + ' WHERE ' + ' AND '.join(where)
+        query = query + ' ORDER BY time DESC LIMIT ?'
+        args.append(limit)
+
+        self.__lock.acquire()
+        try:
+            return self.__db.execute(query, args).fetchall()
+        finally:
+            self.__lock.release()
+
+    def importPlaylist(self, filename):
+        """Add the plays from an old playlist file that are not in the
+        history yet, so importing a file again adds nothing
+
+        returns: the number of plays added"""
+        plays = []
+        fd = open(filename)
+        try:
+            for line in fd:
+                play = parsePlaylistLine(line.decode('utf-8', 'replace'))
+                if play is not None:
+                    plays.append(play)
+        finally:
+            fd.close()
+
+        self.__lock.acquire()
+        try:
+            before = self.__db.total_changes
+            self.__db.executemany('INSERT INTO plays (time, channel, artist, title) '
+                                  'SELECT ?, ?, ?, ? WHERE NOT EXISTS '
+                                  '(SELECT 1 FROM plays WHERE time = ? AND '
+                                  'channel = ? AND artist = ? AND title = ?)',
+                                  [play + play for play in plays])
+            self.__db.commit()
+            return self.__db.total_changes - before
+        finally:
+            self.__lock.release()
@@ -16,23 +16,29 @@
 #along with this program; if not, write to the Free Software
 #Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 
-from Config import Config, toBool
+from Config import getConfig, toBool
 from Player import Player
 from Sirius import Sirius
-from Debug import cleanDebug, log, logfile
+from EventLoop import EventLoop
+from Prefetcher import Prefetcher
+from Debug import cleanDebug, log, logfile, WARNING
 from Exceptions import AuthError, LoginError, InvalidStream
+from Retry import networkErrors
 import sys
 import os
 import time
 import atexit
-import readline
+import signal
 
 class Completer(object):
-    """Allow tab completion of stream names"""
-    def __init__(self, words):
+    """Allow tab completion of stream names
+
+    onMatch is called with the matching words when there are only a few"""
+    def __init__(self, words, onMatch=None):
         self.words = words
         self.prefix = None
         self.matching_words = []
+        self.onMatch = onMatch
 
     def complete(self, prefix, index):
         if prefix != self.prefix:
@@ -40,6 +46,8 @@ class Completer(object):
                 w for w in self.words if w.startswith(prefix)
                 ]
             self.prefix = prefix
+            if self.onMatch and 0 < len(self.matching_words) <= 3:
+                self.onMatch(self.matching_words)
         try:
             return self.matching_words[index]
         except IndexError:
@@ -47,33 +55,66 @@ class Completer(object):
 
 class Interface(object):
     """CLI Interface handler"""
-    def __init__(self, opts, station):
+    def __init__(self, opts, stations):
         """Initilize the interface
 
         opts: a dictionary of command line options
-        station: station requested as an argument"""
+        stations: list of stations requested as arguments, several
+        stations can only be given when recording"""
         cleanDebug()
         self.histfile = None
-        self.config = Config()
+        self.config = getConfig()
+        self.loop = None
+        self.stream = None
+        self.output = None
+        self.prefetcher = None
+        self.likely = []
+        self.started = 0
+        self.failures = 0
+        self.retryAt = 0
 
         self.sirius = Sirius()
         self.player = Player(opts)
         self.options = opts
 
         atexit.register(self.onExit)
+        # Exit normally so the history, cookies and player are saved or closed
+        signal.signal(signal.SIGTERM, self.onTerminate)
+
+        if opts.refresh_lineup:
+            self.sirius.invalidateLineup()
 
         if opts.list:
             self.list()
             sys.exit(0)
 
+        if opts.import_playlist:
+            count = self.sirius.history.importPlaylist(opts.import_playlist)
+            print "Imported %d songs into the history" % count
+            sys.exit(0)
+
+        if opts.history:
+            self.showHistory()
+            sys.exit(0)
+
         if opts.setup:
             self.setup()
             sys.exit(0)
 
         self.notification = toBool(self.config.settings.notifications)
 
-        if station != None:
-            self.play(station)
+        if opts.daemon:
+            if len(stations) > 1 or opts.record:
+                print "The daemon plays one station and doesn't record"
+                sys.exit(1)
+            self.daemon(stations)
+        elif len(stations) > 1:
+            if not opts.record:
+                print "Only one station can be played at a time"
+                sys.exit(1)
+            self.record(stations)
+        elif stations:
+            self.play(stations[0])
         else:
             self.repl()
 
@@ -87,61 +128,226 @@ class Interface(object):
         return userinput
 
 
+    def onTerminate(self, signum, frame):
+        sys.exit(0)
+
     def onExit(self):
         """Allows cleaning up of dangling resources on exit"""
-        try:
-            readline.write_history_file(self.histfile)
-        except:
-            pass
+        if self.histfile:
+            try:
+                import readline
+                readline.write_history_file(self.histfile)
+            except:
+                pass
         try:
             self.player.close()
         except:
             pass
 
     def play(self, stream):
-        """Plays the given stream
+        """Plays the given stream until Ctrl+C is pressed
+
+        Watching the player, polling what is playing and reading the
+        keyboard are separate tasks of one event loop, so another station
+        can be typed in while this one plays.
 
         stream: the station name"""
+        if not self.tune(stream):
+            return
+        if sys.stdin.isatty():
+            self.startPrefetcher()
+
+        self.loop = EventLoop()
+        self.loop.callEvery(1, self.watchPlayer)
+        if self.player.limit:
+            self.loop.callEvery(10, self.player.checkStandby)
+        self.loop.callEvery(float(self.config.settings.get('poll_interval', 30)),
+                            self.pollNowPlaying)
+        if sys.stdin.isatty():
+            self.loop.addReader(sys.stdin, self.readInput)
         try:
-            log('Play %s' % stream)
+            self.loop.run()
+        except KeyboardInterrupt:
+            pass
+        self.loop = None
+        self.output = None
+
+    def tune(self, stream):
+        """Select stream as the one to play, returns False if it is invalid
+
+        stream: the station name"""
+        try:
+            log('Play %s', stream)
             self.sirius.setStreamByLongName(stream)
         except InvalidStream:
             print "Invalid station name. Type 'list' to see available station names"
-            return
+            return False
+        except networkErrors + (AuthError, LoginError), err:
+            log('Selecting %s failed: %s', stream, err, level=WARNING)
+            print "Cannot reach Sirius right now, please try again"
+            return False
+
+        self.stream = stream
+        self.started = 0
+        self.failures = 0
+        self.retryAt = 0
+        if self.options.record:
+            print "Recording %s. Please use Ctrl+C to stop." % stream
         else:
-            if self.options.record:
-                print "Recording %s. Please use Ctrl+C to stop." % stream
-            else:
-                print "Now playing %s. Please use Ctrl+C to stop." % stream
+            print "Now playing %s. Please use Ctrl+C to stop." % stream
+        if sys.stdin.isatty():
+            print "Type another station name to switch to it."
+        self.prefetch()
+        return True
 
-        while True: #playing loop
-            if not self.player.playing():
-                url = self.sirius.getAsxURL()
-                self.player.play(url, stream)
-
-            playing = self.sirius.nowPlaying()
-            if playing['new'] :
-                if not self.options.quiet:
-                    print time.strftime('%H:%M' ) + ' - ' + playing['longName'] + ": " + playing['playing']
-                if self.notification:
-                    import pynotify
-                    if pynotify.init("Pyxis"):
-                        icon = os.path.dirname(__file__) + '/data/dog_white_outline.svg'
-                        n = pynotify.Notification("Sirius", playing['longName'] + ": " + playing['playing'], icon)
-                        n.show()
-            try:
-                time.sleep(30)
-            except KeyboardInterrupt:
+    def startPrefetcher(self):
+        """Start resolving the urls of likely next stations in the
+        background, unless disabled or recording"""
+        settings = self.config.settings
+        if self.prefetcher is not None or self.options.record or \
+           not toBool(settings.get('prefetch', 'Yes')):
+            return
+        self.prefetcher = Prefetcher(self.sirius,
+                                     int(settings.get('prefetch_count', 5)))
+        self.prefetcher.start()
+        self.prefetch()
+
+    def prefetch(self, likely=()):
+        """Tell the prefetcher which stations may be played next
+
+        likely: names more likely than the favorites and the recently
+        typed stations"""
+        if self.prefetcher is None:
+            return
+        names = list(likely)
+        favorites = self.config.settings.get('favorites', '')
+        names.extend([name for name in favorites.split(',') if name.strip()])
+        if 'readline' in sys.modules:
+            readline = sys.modules['readline']
+            for i in range(readline.get_current_history_length(), 0, -1):
+                names.append(readline.get_history_item(i))
+        if self.stream:
+            names = [name for name in names
+                     if name.lower().strip() != self.stream.lower()]
+        self.likely = names
+        self.prefetcher.want(names)
+
+    def preload(self):
+        """Have the player keep standby players for the most likely next
+        stations, once the prefetcher resolved their urls"""
+        streams = []
+        for name in self.likely:
+            if len(streams) >= self.player.limit:
                 break
+            stream = self.sirius.findStream(name.lower().strip(), False)
+            if stream is None or stream in streams:
+                continue
+            streams.append(stream)
+            url = self.sirius.cachedAsxURL(stream)
+            if url is not None:
+                self.player.preload(url, stream['longName'])
+
+    def watchPlayer(self):
+        """Start the player if it is not running
+
+        A player that fails right away, or a url that can't be fetched,
+        is tried again after a delay that doubles with every failure in a
+        row, up to 30 seconds, so a broken stream doesn't ask the website
+        for a new url every second."""
+        now = time.time()
+        if not self.player.playing():
+            if self.started and now - self.started < 5:
+                # The player failed right away, the url may have expired
+                self.sirius.invalidateAsxURL()
+                self.backOff('Player failed')
+            if now < self.retryAt:
+                return
+            try:
+                url = self.sirius.getAsxURL()
+            except networkErrors + (AuthError, LoginError), err:
+                self.backOff('Getting the url of %s failed: %s' % (self.stream, err))
+                return
+            self.player.play(url, self.stream)
+            self.started = time.time()
+            self.watchOutput()
+        elif now - self.started > 5:
+            self.failures = 0
+            self.preload()
+
+    def backOff(self, reason):
+        """Count a failure to play and delay the next try"""
+        self.failures += 1
+        delay = min(30, 2 ** (self.failures - 1))
+        log('%s, %d failures in a row, trying again in %ds', reason,
+            self.failures, delay, level=WARNING)
+        self.retryAt = time.time() + delay
+        self.started = 0
+
+    def watchOutput(self):
+        """Have the event loop read the output of the current player"""
+        if self.output is not None:
+            self.loop.removeReader(self.output)
+        self.output = self.player.output()
+        if self.output is not None:
+            self.loop.addReader(self.output, self.onPlayerOutput)
+
+    def onPlayerOutput(self):
+        """Handle events from the player as soon as it writes them"""
+        for event in self.player.events():
+            if event['event'] == 'error':
+                log('Player error: %s', event['message'], level=WARNING)
+            elif event['event'] == 'eof':
+                self.loop.removeReader(self.output)
+                self.output = None
+                # Restart right away unless the player is failing to start,
+                # then the watcher retries on its next tick
+                if time.time() - self.started > 5:
+                    self.watchPlayer()
+
+    def pollNowPlaying(self):
+        """Report the song playing if it changed"""
+        playing = self.sirius.nowPlaying()
+        if playing['new'] :
+            if not self.options.quiet:
+                print time.strftime('%H:%M' ) + ' - ' + playing['longName'] + ": " + playing['playing']
+            if self.notification:
+                import pynotify
+                if pynotify.init("Pyxis"):
+                    icon = os.path.dirname(__file__) + '/data/dog_white_outline.svg'
+                    n = pynotify.Notification("Sirius", playing['longName'] + ": " + playing['playing'], icon)
+                    n.show()
+
+    def readInput(self):
+        """Handle a line typed while a station is playing"""
+        line = sys.stdin.readline()
+        if not line:
+            self.loop.removeReader(sys.stdin)
+            return
+
+        userinput = line.strip()
+        if not userinput:
+            return
+        if userinput.lower() == 'list':
+            self.list()
+            return
+        if userinput.lower() == 'exit':
+            sys.exit(0)
+
+        if self.tune(userinput):
+            self.player.stop(True)
+            self.watchPlayer()
+            self.pollNowPlaying()
 
     def repl(self):
         """Read Eval Print Loop - Interactive mode
         
         Allows the user to list, select and change channels without ever leaving
         the program"""
+        import readline
         self.histfile = os.path.join(self.config.confpath,"history")
 
-        completer = Completer([x['longName'] for x in self.sirius.getStreams()])
+        completer = Completer([x['longName'] for x in self.sirius.getStreams()],
+                              self.prefetch)
         readline.parse_and_bind("tab: complete")
         readline.set_completer(completer.complete)
         # Remove space as a valid word delimiter, since stream
@@ -153,6 +359,7 @@ class Interface(object):
         except IOError:
             pass
 
+        self.startPrefetcher()
         print "\nWelcome to Pyxis."
 
         if self.options.record:
@@ -169,9 +376,30 @@ class Interface(object):
             if userinput.lower() == 'exit':
                 sys.exit(0)
 
-            self.player.close()
+            self.player.stop(True)
             self.play(userinput)
 
+    def record(self, stations):
+        """Records all of the given stations at once
+
+        stations: list of station names"""
+        from Recorder import RecordingDaemon
+        daemon = RecordingDaemon(self.sirius, self.options, stations)
+        print "Recording %d stations. Please use Ctrl+C to stop." % len(daemon.recordings)
+        daemon.run()
+
+    def daemon(self, stations):
+        """Play the stations clients of the HTTP control API ask for
+
+        stations: optional station to start with"""
+        from Daemon import ControlDaemon
+        daemon = ControlDaemon(self.sirius, self.player, self.options)
+        if stations:
+            daemon.run(stations[0])
+        else:
+            daemon.run()
+        self.player = daemon.player
+
     def list(self):
         """List all available stations"""
         station_cat = None
@@ -189,6 +417,16 @@ class Interface(object):
                 print ' * ' + channel.title()
         print ''
 
+    def showHistory(self):
+        """Print the songs played that match the history options"""
+        plays = self.sirius.history.search(self.options.channel,
+                    self.options.artist, self.options.title, limit=50)
+        for (when, channel, artist, title) in plays:
+            print '%s %s: %s, %s' % (time.strftime('%Y-%m-%d %H:%M', time.localtime(when)),
+                                     channel, title, artist)
+        if not plays:
+            print 'No songs found'
+
     def setup(self):
         """Configuration"""
         self.config.create()
@@ -0,0 +1,98 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+import os
+import time
+import json
+from Debug import log, WARNING
+
+class LineupCache(object):
+    """On-disk cache of the channel lineup
+
+    The lineup is stored as JSON next to cookies.txt along with the time it
+    was fetched and the provider it came from. A cache written by a different
+    format version or provider is ignored."""
+
+    VERSION = 1
+
+    def __init__(self, filename, provider, ttl):
+        """filename: path of the cache file
+        provider: name of the provider the lineup belongs to
+        ttl: number of seconds before the cached lineup is stale"""
+        self.filename = filename
+        self.provider = provider
+        self.ttl = ttl
+        self.streams = None
+        self.fetched = 0
+
+    def load(self):
+        """Read the cache file, returns the list of streams or None"""
+        try:
+            fd = open(self.filename)
+            try:
+                cache = json.load(fd)
+            finally:
+                fd.close()
+        except (IOError, ValueError):
+            return None
+
+        if cache.get('version') != self.VERSION or \
+           cache.get('provider') != self.provider:
+            log('Ignoring lineup cache from %s', cache.get('provider'))
+            return None
+
+        self.streams = cache.get('streams')
+        self.fetched = cache.get('time', 0)
+        log('Loaded %d streams from lineup cache', len(self.streams or []))
+        return self.streams
+
+    def save(self, streams):
+        """Replace the cached lineup with streams, it is only kept in memory
+        if the cache file can't be written"""
+        self.streams = streams
+        self.fetched = time.time()
+        cache = {'version': self.VERSION,
+                 'provider': self.provider,
+                 'time': self.fetched,
+                 'streams': streams}
+
+        # Write to a temporary file first so a reader never sees half a cache
+        tmpfile = '%s.%d' % (self.filename, os.getpid())
+        try:
+            fd = open(tmpfile, 'w')
+            try:
+                json.dump(cache, fd)
+            finally:
+                fd.close()
+            os.rename(tmpfile, self.filename)
+        except (IOError, OSError), err:
+            log('Cannot write the lineup cache %s: %s', self.filename, err,
+                level=WARNING)
+
+    def stale(self):
+        """Returns True if the cached lineup is older than the ttl"""
+        return time.time() - self.fetched > self.ttl
+
+    def invalidate(self):
+        """Throw away the cached lineup"""
+        self.streams = None
+        self.fetched = 0
+        try:
+            os.unlink(self.filename)
+        except OSError:
+            pass
@@ -0,0 +1,52 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+try:
+    from xml.etree.cElementTree import iterparse
+except ImportError:
+    from xml.etree.ElementTree import iterparse
+
+def parseNowPlaying(source, channel=None):
+    """Parse the now-playing feed one <event> at a time
+
+    source: file like object containing the pad_provider.jsp document
+    channel: lower case channel name, parsing stops as soon as it is seen
+
+    returns: dictionary of {'artist', 'song'} keyed by lower case channel
+    name. Only the events up to and including channel are in it when
+    channel was found."""
+    nowplaying = {}
+    root = None
+    for (event, elem) in iterparse(source, events=('start', 'end')):
+        if root is None:
+            root = elem
+        if event != 'end' or elem.tag != 'event':
+            continue
+
+        name = elem.findtext('.//channelname')
+        if name is not None:
+            name = name.strip().lower()
+            nowplaying[name] = {'artist': elem.findtext('.//artist', ''),
+                                'song': elem.findtext('.//songtitle', '')}
+        # Drop the finished event so the tree never grows past one event
+        root.clear()
+
+        if name is not None and name == channel:
+            break
+
+    return nowplaying
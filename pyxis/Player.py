@@ -16,18 +16,144 @@
 #along with this program; if not, write to the Free Software
 #Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 
+from Config import getConfig
 from StreamHandler import StreamHandler
+from Debug import log
 
 class Player(object):
+    """Plays one stream and keeps muted standby players buffering others
+
+    preload() starts a muted standby player for a stream that is likely to
+    be played next. Playing a stream that has a standby player swaps the
+    two: the standby player is unmuted and the current one is muted and
+    kept as the standby player of its stream. The mediaplayer option
+    standby limits how many standby players run, 0 (the default) turns
+    them off. They need a persistent player and are not used when
+    recording.
+
+    Standby players are only looked after by checkStandby(), which should
+    be called every few seconds. A stream whose standby player stopped is
+    not preloaded again until another stream is played."""
+
     def __init__(self, opts):
+        self.options = opts
         self.streamHandler = StreamHandler(opts)
+        self.limit = 0
+        if self.streamHandler.persistent:
+            self.limit = int(getConfig().mediaplayer.get('standby', 0))
+        self.streamHandler.softvol = self.limit > 0
+        self.stream = None
+        self.__stopped = False
+        self.__standby = []
+        self.__failed = set()
 
     def play(self, url, stream):
-        self.streamHandler.play(url, stream)
+        name = stream.lower().strip()
+        standby = self.__take(name)
+        if standby is not None and standby.playing():
+            log('Switching to the standby player of %s', stream)
+            if self.__stopped:
+                self.__standby.append((self.stream, self.streamHandler))
+            else:
+                self.streamHandler.close()
+            self.streamHandler = standby
+            standby.mute(False)
+        else:
+            if standby is not None:
+                standby.close()
+            if self.__stopped:
+                self.streamHandler.stop()
+            self.streamHandler.mute(False)
+            self.streamHandler.play(url, stream)
+        if name != self.stream:
+            self.__failed.clear()
+        self.stream = name
+        self.__stopped = False
+        self.__trim()
+
+    def preload(self, url, stream):
+        """Start a muted standby player for stream unless there is one"""
+        name = stream.lower().strip()
+        if not self.limit or name == self.stream or self.__find(name) or \
+           name in self.__failed:
+            return
+        log('Preloading %s', stream)
+        handler = StreamHandler(self.options)
+        handler.softvol = True
+        handler.mute(True)
+        handler.play(url, stream)
+        self.__standby.append((name, handler))
+        self.__trim()
 
     def playing(self):
+        if self.__stopped:
+            return False
         return self.streamHandler.playing();
 
+    def output(self):
+        """Returns the file to watch for player output, or None"""
+        return self.streamHandler.output()
+
+    def events(self):
+        """Returns the events parsed from the player output since the last
+        call, see StreamHandler.parseOutput"""
+        return self.streamHandler.events()
+
+    def stop(self, switching=False):
+        """Stop playing, the player may be kept running for the next stream
+
+        switching: another stream is played next, with standby players
+        the stream is then only muted and play() decides whether it is
+        kept as a standby player. Otherwise the standby players are
+        closed too."""
+        if switching and self.limit and not self.__stopped and \
+           self.streamHandler.playing():
+            self.streamHandler.mute(True)
+            self.__stopped = True
+        else:
+            self.streamHandler.stop()
+        if not switching:
+            for (name, handler) in self.__standby:
+                handler.close()
+            self.__standby = []
+
     def close(self):
         self.streamHandler.close()
+        for (name, handler) in self.__standby:
+            handler.close()
+        self.__standby = []
+
+    def standby(self):
+        """Returns the names of the streams with a standby player"""
+        return [name for (name, handler) in self.__standby]
+
+    def __find(self, name):
+        for (standby, handler) in self.__standby:
+            if standby == name:
+                return handler
+        return None
+
+    def __take(self, name):
+        """Remove the standby player of name from the standby players"""
+        handler = self.__find(name)
+        if handler is not None:
+            self.__standby.remove((name, handler))
+        return handler
+
+    def checkStandby(self):
+        """Read the output of the standby players and close the ones
+        whose stream stopped"""
+        for (name, handler) in self.__standby[:]:
+            if not handler.playing():
+                log('Standby player of %s stopped', name)
+                self.__failed.add(name)
+                handler.close()
+                self.__standby.remove((name, handler))
+
+    def __trim(self):
+        """Close the oldest standby players beyond the limit"""
+        while len(self.__standby) > self.limit:
+            (name, handler) = self.__standby.pop(0)
+            log('Closing the standby player of %s', name)
+            handler.close()
 
@@ -0,0 +1,90 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+import threading
+from Debug import log, WARNING
+from Retry import RetryPolicy
+
+class Prefetcher(threading.Thread):
+    """Resolves the ASX urls of the stations likely to be played next
+
+    A background thread works through the stations given to want(), most
+    likely first, so their urls are in the url cache of Sirius by the time
+    one of them is played and switching doesn't wait for the website.
+
+    Names are only looked up in the lineup loaded already, and a url is
+    fetched with a single attempt, so prefetching never holds up the
+    stations the user actually plays."""
+
+    def __init__(self, sirius, limit=5):
+        """sirius: Sirius instance used to resolve the urls
+        limit: most stations prefetched at once"""
+        threading.Thread.__init__(self)
+        self.setDaemon(True)
+        self.sirius = sirius
+        self.limit = limit
+        self.retry = RetryPolicy(1, verbose=False)
+        self.__wanted = []
+        self.__lock = threading.Lock()
+        self.__wake = threading.Event()
+
+    def want(self, names):
+        """Replace the stations to prefetch with names, most likely first
+
+        Names that are not in the loaded lineup are skipped, stations whose
+        url is cached already cost nothing."""
+        wanted = []
+        for name in names:
+            name = name.lower().strip()
+            if name in wanted or self.sirius.findStream(name, False) is None:
+                continue
+            wanted.append(name)
+
+        self.__lock.acquire()
+        try:
+            self.__wanted = wanted[:self.limit]
+            if self.__wanted:
+                self.__wake.set()
+        finally:
+            self.__lock.release()
+
+    def run(self):
+        while True:
+            self.__wake.wait()
+            name = self.__next()
+            if name is not None:
+                self.__fetch(name)
+
+    def __next(self):
+        self.__lock.acquire()
+        try:
+            if not self.__wanted:
+                self.__wake.clear()
+                return None
+            return self.__wanted.pop(0)
+        finally:
+            self.__lock.release()
+
+    def __fetch(self, name):
+        stream = self.sirius.findStream(name, False)
+        if stream is None:
+            return
+        try:
+            self.sirius.getAsxURL(stream, self.retry)
+        except Exception, err:
+            log('Prefetching %s failed: %s', name, err, level=WARNING)
@@ -23,17 +23,11 @@ import os
 import sys
 import re
 import time
-from Config import Config, toBool
+from Config import getConfig, toBool
 from Exceptions import AuthError, LoginError, InvalidStream
 from Debug import log, logfile
-from BeautifulSoup import BeautifulSoup
-
-
-try:
-    from IPython.Shell import IPShellEmbed
-    ipshell = IPShellEmbed()
-except:
-    pass
+from Soup import BeautifulSoup
+from StreamList import parseStreams
 
 class ProviderCanada(object):
 
@@ -42,7 +36,7 @@ class ProviderCanada(object):
          SipieConf.items()
       """
         self.sirius = sirius
-        config = Config()
+        config = getConfig()
         self.account = config.account
         self.settings = config.settings
         self.host = 'mp.siriuscanada.ca'
@@ -51,7 +45,7 @@ class ProviderCanada(object):
         self.token = ''
         self.__captchaCallback = None  
 
-    def auth(self):
+    def auth(self, probe=True):
         """run auth to setup all the cookies you need to get the stream
           self.__captchaCallback should be set to 
           a fuction that accepts a file name as an
@@ -60,6 +54,9 @@ class ProviderCanada(object):
 
           if no function is passed it will Guess (and fail?)
 
+          probe is accepted for compatibility with ProviderUSA, the
+          player page is always fetched as it holds the login token
+
       """
 
         url = 'http://%s/sirius/ca/servlet/MediaPlayer' % self.host
@@ -140,7 +137,6 @@ class ProviderCanada(object):
           Or use getStreams()
       """
 
-        allstreams = []
         url = 'http://%s/sirius/ca/servlet/MediaPlayer' % self.host
         hd = self.sirius.getURL(url)
         data = hd.read()
@@ -161,19 +157,7 @@ class ProviderCanada(object):
             raise LoginError
         #self.__dbfd("miniplayer.html",data) #DEBUG XXX
       #data = open('small_playing_100.html').read() # DEBUG
-        data = self.sirius.sanitize(data)
-        soup = BeautifulSoup(data)
-        for catstrm in soup.findAll('option'):
-            if catstrm['value'].find('|') <> -1:  # IF FOUND
-                chunks = catstrm['value'].split('|')
-                stream = {
-                    'channelKey': chunks[2],
-                    'genreKey':  chunks[1],
-                    'categoryKey': chunks[0],
-                    'selectedStream': catstrm['value'],
-                    'longName': catstrm.contents[0].split(';')[-1].lower()
-                    }
-                allstreams.append(stream)
+        allstreams = parseStreams(data, self.sirius.sanitize)
 
         if len(allstreams) < 5:
             print "ERROR getting streams, see streams-DEBUG.html" # DEBUG
@@ -191,7 +175,7 @@ class ProviderCanada(object):
          or use getAsxUrl
       """
 
-        self.sirius.validateStream()
+        self.sirius.validateStream(stream)
 
       # Get hashkey , and the url for the asx
         post = {'activity': 'selectStream', 'stream': stream['channelKey'], 'token': self.token}
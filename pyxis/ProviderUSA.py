@@ -23,17 +23,18 @@ import os
 import sys
 import re
 import time
-from Debug import log, logfile
-from Config import Config, toBool
+from Debug import log, logfile, ERROR
+from Config import getConfig, toBool
 from Exceptions import AuthError, LoginError, InvalidStream
-from BeautifulSoup import BeautifulSoup
+from Soup import BeautifulSoup
+from StreamList import parseStreams
 
 class ProviderUSA(object):
     """Handles all access to the SIRIUS USA website"""
     def __init__(self, sirius):
 	self.sirius = sirius
         #Get settings
-        config = Config()
+        config = getConfig()
         self.account = config.account
         self.settings = config.settings
 
@@ -42,7 +43,7 @@ class ProviderUSA(object):
                         sys.platform}
         self.token = ''
 
-    def auth(self):
+    def auth(self, probe=True):
         """run auth to setup all the cookies you need to get the stream
           self.__captchaCallback should be set to 
           a fuction that accepts a file name as an
@@ -51,19 +52,23 @@ class ProviderUSA(object):
 
           if no function is passed it will Guess (and fail?)
 
+          probe: check whether the session is still logged in first,
+          pass False when the website just rejected the session
+
         """
         log('Authenticating ...')
         #Am i authed, should be its own function really
-        data = self.sirius.getURL(
-          'http://www.sirius.com/player/listen/play.action').read()
-        if 'NOW PLAYING TITLE:START' in data:
-          log('Authenticated')
-          return True
+        if probe:
+          data = self.sirius.getURL(
+            'http://www.sirius.com/player/listen/play.action').read()
+          if 'NOW PLAYING TITLE:START' in data:
+            log('Authenticated')
+            return True
 
         session = self.sirius.findSessionID()
-	log('SESSIONID= %s' % session)
+	log('SESSIONID= %s', session)
         if not session:
-          getURL(
+          self.sirius.getURL(
             'http://www.sirius.com/player/home/siriushome.action').read()
           session = self.sirius.findSessionID()
         if not session:
@@ -82,7 +87,7 @@ class ProviderUSA(object):
         post = urllib.urlencode(postdict) + '&captchaID=%3E%3A0%08g%60n'
         data = self.sirius.getURL(authurl, poststring=post).read()
         if '<title>SIRIUS Player' in data:
-          log("got valid page at: " + authurl + "\n")
+          log("got valid page at: %s", authurl)
           return True
         else:
           raise LoginError
@@ -94,7 +99,6 @@ class ProviderUSA(object):
           Or use getStreams()
       """
         log('Getting streams ...')
-        allstreams = []
         url = 'http://www.sirius.com/player/listen/play.action?resizeActivity=minimize'
         hd = self.sirius.getURL(url)
         data = hd.read()
@@ -112,21 +116,9 @@ class ProviderUSA(object):
             print '\nLoginError: to many logins today?'
             logfile('login-error.html', data)  #DEBUG 0
             raise LoginError
-        data = self.sirius.sanitize(data)
-        soup = BeautifulSoup(data)
-        for catstrm in soup.findAll('option'):
-            if catstrm['value'].find('|') <> -1:  # IF FOUND
-                chunks = catstrm['value'].split('|')
-                stream = {
-                    'channelKey': chunks[2],
-                    'genreKey':  chunks[1],
-                    'categoryKey': chunks[0],
-                    'selectedStream': catstrm['value'],
-                    'longName': catstrm.contents[0].split(';')[-1].lower()
-                    }
-                allstreams.append(stream)
+        allstreams = parseStreams(data, self.sirius.sanitize)
         if len(allstreams) < 5:
-            log("ERROR getting streams, see streams-DEBUG.html") # DEBUG
+            log("ERROR getting streams, see streams-DEBUG.html", level=ERROR) # DEBUG
             logfile('streams-DEBUG.html',data)  # DEBUG
             raise AuthError
         else:
@@ -142,7 +134,7 @@ class ProviderUSA(object):
          or use getAsxUrl
       """
 
-        self.sirius.validateStream()
+        self.sirius.validateStream(stream)
 
         postdict = { 'channelKey': stream['channelKey'],
                      'genreKey': stream['genreKey'],
@@ -160,10 +152,10 @@ class ProviderUSA(object):
             firstURL = soup.find('param', {'name': 'FileName'})['value']
         except TypeError:
              logfile("getasuxurl-ERROR.html",data) #DEBUG
-             log("\nAuth Error:, see getasuxurl-ERROR.html\n") #DEBUG
+             log("Auth Error:, see getasuxurl-ERROR.html", level=ERROR) #DEBUG
              raise AuthError
         if not firstURL.startswith('http://'):
             firstURL = 'http://%s%s' % (self.host, firstURL)
         asxURL = self.sirius.getURL(firstURL).read()
-        log('asxURL = %s' % asxURL)
+        log('asxURL = %s', asxURL)
         return asxURL
@@ -0,0 +1,196 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+import copy
+import time
+from Config import getConfig
+from StreamHandler import StreamHandler
+from Exceptions import AuthError, InvalidStream, LoginError
+from Retry import networkErrors
+from Debug import log, WARNING
+
+class RestartPolicy(object):
+    """Decides when a recording that stopped is started again
+
+    A recording that ran for less than stable seconds counts as a failure,
+    the restart delay doubles with every failure in a row. No more than
+    maxrestarts restarts are made within window seconds, 0 means no limit."""
+
+    def __init__(self, maxrestarts=10, delay=2, maxdelay=300, stable=60,
+                 window=3600):
+        self.maxrestarts = maxrestarts
+        self.delay = delay
+        self.maxdelay = maxdelay
+        self.stable = stable
+        self.window = window
+        self.failures = 0
+        self.__restarts = []
+
+    def stopped(self, uptime):
+        """Record that the recording stopped after uptime seconds
+
+        returns: seconds to wait before restarting or None to give up"""
+        now = time.time()
+        self.__restarts = [t for t in self.__restarts if now - t < self.window]
+        if self.maxrestarts and len(self.__restarts) >= self.maxrestarts:
+            return None
+        self.__restarts.append(now)
+
+        if uptime < self.stable:
+            self.failures += 1
+        else:
+            self.failures = 1
+        return min(self.maxdelay, self.delay * 2 ** (self.failures - 1))
+
+class Recording(object):
+    """A single channel recorded by its own StreamHandler"""
+
+    def __init__(self, name, url, handler, policy):
+        self.name = name
+        self.url = url
+        self.handler = handler
+        self.policy = policy
+        self.started = None
+        self.restartAt = None
+        self.failed = False
+
+    def start(self):
+        self.handler.close()
+        self.handler.play(self.url, self.name)
+        self.started = time.time()
+        self.restartAt = None
+
+    def recording(self):
+        return self.handler.playing()
+
+class RecordingDaemon(object):
+    """Records several channels at once from one Sirius session
+
+    Every channel is recorded to its own file by its own StreamHandler. The
+    ASX url of each channel is resolved once up front and only resolved
+    again when a restarted recording keeps failing. A channel whose url
+    can't be fetched up front is retried like a recording that stopped."""
+
+    def __init__(self, sirius, opts, channels):
+        """sirius: an authenticated Sirius instance
+        opts: command line options
+        channels: names of the channels to record"""
+        settings = getConfig().recordings
+        self.sirius = sirius
+        self.quiet = opts.quiet
+        self.interval = float(settings.get('poll_interval', 30))
+
+        # Every recording names its own file, a single --output can't be shared
+        self.options = copy.copy(opts)
+        self.options.output = None
+
+        self.recordings = []
+        for name in channels:
+            try:
+                url = self.resolve(name)
+            except InvalidStream:
+                print "Invalid station name: %s" % name
+                continue
+            except networkErrors + (AuthError, LoginError), err:
+                print "Cannot reach Sirius for %s, trying again later" % name
+                log('Resolving %s failed: %s', name, err, level=WARNING)
+                url = None
+            policy = RestartPolicy(int(settings.get('max_restarts', 10)),
+                                   float(settings.get('restart_delay', 2)))
+            self.recordings.append(Recording(name, url,
+                                   StreamHandler(self.options), policy))
+
+    def resolve(self, name, fresh=False):
+        """Returns the ASX url of the channel name
+
+        fresh: don't use a cached url"""
+        self.sirius.setStreamByLongName(name)
+        if fresh:
+            self.sirius.invalidateAsxURL()
+        return self.sirius.getAsxURL()
+
+    def run(self):
+        """Record until every recording has failed or Ctrl+C is pressed"""
+        for recording in self.recordings:
+            if recording.url is None:
+                self.schedule(recording, time.time(), 0)
+                continue
+            log('Recording %s', recording.name)
+            recording.start()
+
+        nextpoll = 0
+        try:
+            try:
+                while [r for r in self.recordings if not r.failed]:
+                    now = time.time()
+                    for recording in self.recordings:
+                        self.supervise(recording, now)
+                    if now >= nextpoll:
+                        self.report()
+                        nextpoll = now + self.interval
+                    time.sleep(1)
+            except KeyboardInterrupt:
+                pass
+        finally:
+            self.close()
+
+    def supervise(self, recording, now):
+        """Restart recording according to its policy if it stopped"""
+        if recording.failed or recording.recording():
+            return
+
+        if recording.restartAt is None:
+            self.schedule(recording, now, now - recording.started)
+        elif now >= recording.restartAt:
+            if recording.url is None or recording.policy.failures > 1:
+                # The url may have expired
+                try:
+                    recording.url = self.resolve(recording.name, True)
+                except networkErrors + (AuthError, LoginError,
+                                        InvalidStream), err:
+                    log('Resolving %s failed: %s', recording.name, err,
+                        level=WARNING)
+                    self.schedule(recording, now, 0)
+                    return
+            recording.start()
+
+    def schedule(self, recording, now, uptime):
+        """Count a failed start or a stop after uptime seconds against the
+        policy of recording, and schedule the restart or give up"""
+        delay = recording.policy.stopped(uptime)
+        if delay is None:
+            print "Giving up on recording %s" % recording.name
+            recording.failed = True
+            recording.handler.close()
+            return
+        log('Recording %s stopped, restarting in %ds', recording.name, delay)
+        recording.restartAt = now + delay
+
+    def report(self):
+        """Print what is playing on each channel that changed song"""
+        for recording in self.recordings:
+            if recording.failed:
+                continue
+            playing = self.sirius.nowPlaying(recording.name)
+            if playing['new'] and not self.quiet:
+                print time.strftime('%H:%M') + ' - ' + playing['longName'] + \
+                    ": " + playing['playing']
+
+    def close(self):
+        for recording in self.recordings:
+            recording.handler.close()
@@ -0,0 +1,95 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+import urllib2
+import httplib
+import socket
+import random
+import time
+from Debug import log, WARNING
+
+# Errors of a request that failed on the way, not because of what was asked
+networkErrors = (urllib2.URLError, socket.error, httplib.HTTPException)
+
+class RetryPolicy(object):
+    """Decides whether and when a failed request is tried again
+
+    The delay doubles after every failed attempt starting at delay and
+    never exceeding maxdelay. Each delay is shortened by a random part of up
+    to jitter (0 to 1) of itself so that many clients do not retry in step.
+    Client errors (HTTP 4xx) are never retried."""
+
+    def __init__(self, attempts=8, delay=0.5, maxdelay=30, jitter=0.5,
+                 verbose=True):
+        """attempts: number of tries before giving up, 0 tries forever
+        delay: seconds to wait after the first failure
+        maxdelay: longest wait between two tries
+        jitter: fraction of each delay that is randomized
+        verbose: tell the user about retries, not just the debug log"""
+        self.attempts = attempts
+        self.delay = delay
+        self.maxdelay = maxdelay
+        self.jitter = jitter
+        self.verbose = verbose
+
+    def fromSettings(cls, settings):
+        """Build the policy described by the retry options of a config
+        section, using the defaults for missing options"""
+        return cls(int(settings.get('retry_attempts', 8)),
+                   float(settings.get('retry_delay', 0.5)),
+                   float(settings.get('retry_max_delay', 30)))
+    fromSettings = classmethod(fromSettings)
+
+    def retryable(self, error):
+        """Returns True if error is worth trying again"""
+        if isinstance(error, urllib2.HTTPError):
+            return error.code >= 500 or error.code in (408, 429)
+        return isinstance(error, networkErrors)
+
+    def wait(self, attempt):
+        """Returns the number of seconds to wait after attempt failed"""
+        # Past 2 ** 32 the delay is maxdelay anyway, a larger power would
+        # overflow a float when trying forever
+        delay = min(self.maxdelay, self.delay * 2 ** min(attempt - 1, 32))
+        return delay - delay * self.jitter * random.random()
+
+    def call(self, what, func, *args):
+        """Call func with args until it succeeds or the policy gives up
+
+        what: description of the call for error messages
+
+        returns: the result of func, the last error is raised on failure"""
+        attempt = 0
+        while True:
+            try:
+                return func(*args)
+            except Exception, err:
+                attempt += 1
+                if not self.retryable(err):
+                    raise
+                if self.attempts and attempt >= self.attempts:
+                    log('Giving up on %s after %d attempts: %s', what, attempt, err,
+                        level=WARNING)
+                    raise
+
+                delay = self.wait(attempt)
+                log('Error while fetching %s: %s, retry in %.1fs', what, err, delay,
+                    level=WARNING)
+                if self.verbose:
+                    print("Error while fetching %s\nTrying again in %.1f seconds..." % (what, delay))
+                time.sleep(delay)
@@ -0,0 +1,85 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+import os
+import cookielib
+import threading
+from Debug import log
+
+class SessionStore(object):
+    """Cookie jar that is written to disk behind the requests
+
+    touch() is called after every response. When a cookie changed, a flush
+    is scheduled interval seconds later so a burst of requests results in a
+    single write. The file is replaced by renaming a temporary file over it,
+    and nothing is written if the cookies are the same as on disk."""
+
+    def __init__(self, filename, interval=5):
+        """filename: the cookies.txt file
+        interval: seconds to wait before writing changed cookies"""
+        self.filename = filename
+        self.interval = interval
+        self.jar = cookielib.MozillaCookieJar(filename)
+        if os.path.isfile(filename):
+            # this way its all one big session, even on exit and restart
+            self.jar.load(ignore_discard=True, ignore_expires=True)
+
+        self.__saved = self.__signature()
+        self.__timer = None
+        self.__lock = threading.Lock()
+
+    def __signature(self):
+        return sorted([(c.domain, c.path, c.name, c.value, c.expires, c.secure)
+                       for c in self.jar])
+
+    def dirty(self):
+        """Returns True if the cookies differ from the ones on disk"""
+        return self.__signature() != self.__saved
+
+    def touch(self):
+        """Schedule a flush if the cookies changed"""
+        if self.__timer is not None or not self.dirty():
+            return
+        self.__lock.acquire()
+        try:
+            if self.__timer is None:
+                self.__timer = threading.Timer(self.interval, self.flush)
+                self.__timer.setDaemon(True)
+                self.__timer.start()
+        finally:
+            self.__lock.release()
+
+    def flush(self):
+        """Write the cookies to disk now if they changed"""
+        self.__lock.acquire()
+        try:
+            if self.__timer is not None:
+                self.__timer.cancel()
+                self.__timer = None
+
+            signature = self.__signature()
+            if signature == self.__saved:
+                return
+
+            tmpfile = '%s.%d' % (self.filename, os.getpid())
+            self.jar.save(tmpfile, ignore_discard=True, ignore_expires=True)
+            os.rename(tmpfile, self.filename)
+            self.__saved = signature
+            log('Saved %d cookies', len(signature))
+        finally:
+            self.__lock.release()
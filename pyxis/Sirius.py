@@ -16,43 +16,35 @@
 #along with this program; if not, write to the Free Software
 #Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 
-import cookielib
 import urllib2
 import urllib
+import httplib
+import socket
 import os
 import sys
-import re
 import time
-from Config import Config, toBool
-from ProviderUSA import ProviderUSA
-from ProviderCanada import ProviderCanada
-from Exceptions import AuthError, LoginError, InvalidStream
-from Debug import log, logfile
-from xml.dom.minidom import parse
+import threading
+import atexit
+from cStringIO import StringIO
+from Config import getConfig, toBool
+from Exceptions import AuthError, InvalidStream
+from Debug import log, logfile, ERROR, WARNING
+from LineupCache import LineupCache
+from FeedCache import FeedCache
+from NowPlaying import parseNowPlaying
+from ChannelIndex import ChannelIndex
+from Transport import KeepAliveHandler, CompressionProcessor
+from Retry import RetryPolicy
+from SessionStore import SessionStore
+from AuthCache import AuthCache
+from AsxCache import AsxCache
 import htmlfixes
 
-try:
-    from BeautifulSoup import BeautifulSoup
-except ImportError:
-    print 'Missing dependency: BeautifulSoup'
-    print ' to install run `easy_install BeautifulSoup`'
-    print ' or if you have apt try '
-    print ' apt-get install python-beautifulsoup'
-    print ''
-    print 'or download the beautifulsoup.py module and put it in the current directory.'
-    print 'http://www.crummy.com/software/BeautifulSoup/'
-    sys.exit(300)
-
-if 'find' not in dir(BeautifulSoup):
-    print 'Pyxis requires a newer version of Beautiful soup:'
-    print 'Get the latest version from: http://www.crummy.com/software/BeautifulSoup/'
-    sys.exit(301)
-
 class Sirius(object):
     """Handles all access to the SIRIUS website"""
     def __init__(self):
         #Get settings
-        config = Config()
+        config = getConfig()
         self.account = config.account
         self.settings = config.settings
 
@@ -63,47 +55,108 @@ class Sirius(object):
         self.__stream = None
         self.asxURL = None
         self.allstreams = []
-        self.playing = None
+        self.playing = {}
         self.__cookie_jar = None
+        self.__session = None
+        self.__opener = None
+        # Provider requests are made one at a time, they share the login
+        self.__lock = threading.RLock()
+        # Retry policy of the requests made by a thread, see getAsxURL
+        self.__local = threading.local()
 
         if self.account.login_type not in ['subscriber', 'guest']:
             print 'invalid login_type in config file'
             sys.exit(101)
 
+        # Only the provider in use is imported
         if toBool(self.account.canada):
+            from ProviderCanada import ProviderCanada
             self.provider = ProviderCanada(self)
+            providername = 'canada'
         else:
+            from ProviderUSA import ProviderUSA
             self.provider = ProviderUSA(self)
+            providername = 'usa'
+        self.__sanitizer = htmlfixes.sanitizer(providername)
 
         self.cookiefile = os.path.join(config.confpath, 'cookies.txt')
-        self.playlist = os.path.join(config.confpath, 'playlist')
+        self.__historyfile = os.path.join(config.confpath, 'history.db')
+        self.__history = None
         self.__setupOpener()
+        # The ttls and the other settings are set by configure()
+        self.authcache = AuthCache(os.path.join(config.confpath, 'session'), 0)
+        self.__lineup = LineupCache(os.path.join(config.confpath, 'lineup'),
+                                    providername, 0)
+        self.__refresher = None
+        self.__rechecked = 0
+        self.__nowplaying = FeedCache(
+            'http://www.siriusxm.com/padData/pad_provider.jsp?all_channels=y',
+            0, self.__headers, self.__openFeed)
+        self.__asxcache = AsxCache(0)
+        self.__channels = None
+        self.configure()
+
+    def configure(self):
+        """Read the settings again after the config file was reloaded
+
+        Everything in the settings and aliases sections takes effect, the
+        account, the provider and the config directory are only read when
+        Sirius is created."""
+        config = getConfig()
+        self.settings = config.settings
+        self.provider.settings = config.settings
+        self.retry = RetryPolicy.fromSettings(self.settings)
+        self.__session.interval = float(
+            self.settings.get('cookie_flush_interval', 5))
+        self.authcache.maxage = int(self.settings.get('auth_probe_age', 900))
+        self.__lineup.ttl = int(self.settings.get('lineup_ttl', 86400))
+        self.__recheck = float(self.settings.get('lineup_recheck', 300))
+        self.__nowplaying.ttl = int(self.settings.get('nowplaying_ttl', 15))
+        self.__asxcache.ttl = float(self.settings.get('asx_ttl', 300))
+        self.__asxcache.validate = None
+        if toBool(self.settings.get('asx_validate', 'No')):
+            self.__asxcache.validate = self.__checkAsxURL
+
+        self.__aliases = {}
+        if hasattr(config, 'aliases'):
+            self.__aliases = vars(config.aliases)
+        # The channel index is built again with the new aliases
+        self.__channels = None
 
     def __setupOpener(self):
         """Initialize proper cookies and parameters for website retrival"""
-        self.__cookie_jar = cookielib.MozillaCookieJar(self.cookiefile)
+        self.__session = SessionStore(self.cookiefile)
+        self.__cookie_jar = self.__session.jar
+        atexit.register(self.__session.flush)
         cookie_handler = urllib2.HTTPCookieProcessor(self.__cookie_jar)
-        if os.path.isfile(self.cookiefile):
-            self.__cookie_jar.load()
-         # this way its all one big session, even on exit and restart
-            self.__cookie_jar.load(ignore_discard=True, ignore_expires=
-                                 True)
 
+        handlers = [cookie_handler, KeepAliveHandler(), CompressionProcessor()]
         http_proxy = os.environ.get('http_proxy')
         if http_proxy is not None:
-            proxy_handler = urllib2.ProxyHandler({'http': http_proxy})
-            opener = urllib2.build_opener(cookie_handler, proxy_handler)
-        else:
-            opener = urllib2.build_opener(cookie_handler)
-        urllib2.install_opener(opener)
+            handlers.append(urllib2.ProxyHandler({'http': http_proxy}))
+        self.__opener = urllib2.build_opener(*handlers)
+        urllib2.install_opener(self.__opener)
+
+    def addHandler(self, handler):
+        """Add a urllib2 handler to the requests to the website, used to
+        answer them locally in benchmarks"""
+        self.__opener.add_handler(handler)
+
+    def getHistory(self):
+        """Returns the song history, the database is opened on first use"""
+        if self.__history is None:
+            from History import History
+            self.__history = History(self.__historyfile)
+            atexit.register(self.__history.flush)
+        return self.__history
+    history = property(getHistory)
 
     def sanitize(self, data):
         """ Sanitizes Data against specific errors in the Sirus HTML that
-        Beautiful soup can not handle.
+        Beautiful soup can not handle, using the fixes of the provider.
         """
-        for sub in htmlfixes.subs:
-            data = re.sub(sub[0], sub[1], data)
- 
+        data = self.__sanitizer(data)
+
         logfile('sanitize.html', data) #DEBUG
 
         return data
@@ -115,12 +168,14 @@ class Sirius(object):
             return cookie.value
         return False
 
-    def getURL(self, url, postdict=None, poststring=None):
+    def getURL(self, url, postdict=None, poststring=None, retry=None):
         """ get a url, the second arg could be dictionary of 
          options for a post 
          If there is no second option use get
          This will use the cookies and tokens for this instance 
          of Sirius
+         Failed requests are retried according to retry, a RetryPolicy,
+         or the policy of the calling thread or self.retry if none is given
          returns a file handle
       """
 
@@ -131,115 +186,246 @@ class Sirius(object):
         if poststring:
             postdata = poststring
 
-        log("url=%s" % url) #DEBUG
-        log("POST=%s" % postdata)#DEBUG
+        log("url=%s", url) #DEBUG
+        log("POST=%s", postdata)#DEBUG
 
         req = urllib2.Request(url, postdata, self.__headers)
-        handle = None
-        while handle is None:
-            try:
-                handle = urllib2.urlopen(req)
-            except urllib2.URLError:
-                print("Error while fetching %s\nTrying again in 30 seconds..." % url);
-                time.sleep(30);
-                handle = None
-        self.__cookie_jar.save(ignore_discard=True, ignore_expires=True)
+        if retry is None:
+            retry = getattr(self.__local, 'retry', None) or self.retry
+        handle = retry.call(url, self.__opener.open, req)
+        self.__session.touch()
         return handle
 
-    def getAsxURL(self):
-        ''' Returns an the url of the asx for the self.__stream,
+    def __openFeed(self, req):
+        '''Open the now-playing feed, which is polled again soon anyway so
+        only retry quickly and quietly'''
+        retry = RetryPolicy(2, self.retry.delay, self.retry.maxdelay,
+                            verbose=False)
+        return retry.call(req.get_full_url(), self.__opener.open, req)
+
+    def getAsxURL(self, stream=None, retry=None):
+        ''' Returns an the url of the asx for stream, self.__stream by default
         Diffrent from tryGetAsxURL it will try to authticate insted of
         fail if its needs to
+        retry: RetryPolicy of the requests instead of self.retry, a
+        background caller gives up quickly so it doesn't hold the lock
         '''
+        if stream is None:
+            stream = self.__stream
+        url = self.__asxcache.get(stream, self.settings.bitrate)
+        if url is not None:
+            log('Using cached url for %s', stream['longName'])
+            return url
+
+        self.__lock.acquire()
+        self.__local.retry = retry
         try:
-            url = self.provider.tryGetAsxURL(self.__stream)
-        except AuthError:
-            self.provider.auth()
-            url = self.provider.tryGetAsxURL(self.__stream)
+            self.ensureAuth()
+            try:
+                url = self.provider.tryGetAsxURL(stream)
+            except AuthError:
+                self.reauth()
+                url = self.provider.tryGetAsxURL(stream)
+            self.authcache.record(self.findSessionID())
+        finally:
+            self.__local.retry = None
+            self.__lock.release()
+        self.__asxcache.put(stream, self.settings.bitrate, url)
         return url
 
+    def cachedAsxURL(self, stream):
+        '''Returns the cached asx url of stream or None, never fetches it'''
+        return self.__asxcache.get(stream, self.settings.bitrate)
+
+    def invalidateAsxURL(self, stream=None):
+        '''Forget the cached asx url of stream, self.__stream by default,
+        after playing it failed'''
+        if stream is None:
+            stream = self.__stream
+        log('Invalidating cached url for %s', stream['longName'])
+        self.__asxcache.invalidate(stream, self.settings.bitrate)
+
+    def __checkAsxURL(self, url):
+        '''Cheap check that a cached url still works, a single HEAD request'''
+        if not url.startswith('http://'):
+            return True
+        req = urllib2.Request(url, None, self.__headers)
+        req.get_method = lambda: 'HEAD'
+        try:
+            self.__opener.open(req).close()
+        except (urllib2.URLError, httplib.HTTPException, socket.error), err:
+            log('Checking %s failed: %s', url, err)
+            return False
+        return True
+
+    def ensureAuth(self):
+        '''Log in if there is no session yet, an existing session is used
+        as is and only replaced by reauth() when a request fails with it'''
+        if self.findSessionID():
+            return
+        self.provider.auth(probe=False)
+        self.authcache.record(self.findSessionID())
+
+    def reauth(self):
+        '''Log in again after a request failed with the current session
+
+        A session validated less than auth_probe_age ago is probed first,
+        the request may have failed for another reason than the login'''
+        probe = self.authcache.valid(self.findSessionID())
+        self.authcache.invalidate()
+        self.provider.auth(probe=probe)
+        self.authcache.record(self.findSessionID())
+
     def getStreams(self):
         ''' Returns an the list of streams
+        The lineup is served from the on-disk cache when there is one, a
+        stale cache is still returned but gets refreshed in the background
+        '''
+        streams = self.__lineup.streams
+        if streams is None:
+            streams = self.__lineup.load()
+        if not streams:
+            return self.fetchStreams()
+
+        if self.__lineup.stale():
+            self.__refreshLineup()
+        return streams
+
+    def fetchStreams(self):
+        ''' Fetches the list of streams from the website and caches it
         Diffrent from tryGeStreams it will try to authticate insted of
         fail if its needs to
         '''
+        self.__lock.acquire()
         try:
-            streams = self.provider.tryGetStreams()
-        except AuthError:
-            self.provider.auth()
-            streams = self.provider.tryGetStreams()
+            self.ensureAuth()
+            try:
+                streams = self.provider.tryGetStreams()
+            except AuthError:
+                self.reauth()
+                streams = self.provider.tryGetStreams()
+            self.authcache.record(self.findSessionID())
+        finally:
+            self.__lock.release()
+        self.__lineup.save(streams)
         return streams
 
+    def invalidateLineup(self):
+        '''Forget the cached lineup so the next getStreams fetches it'''
+        log('Invalidating lineup cache')
+        self.__lineup.invalidate()
+        self.allstreams = []
+
+    def __refreshLineup(self):
+        '''Start refreshing a stale lineup in a background thread'''
+        if self.__refresher is not None and self.__refresher.isAlive():
+            return
+        self.__refresher = threading.Thread(target=self.__backgroundRefresh)
+        self.__refresher.setDaemon(True)
+        self.__refresher.start()
+
+    def __backgroundRefresh(self):
+        '''Refresh the lineup without prompting the user to log in'''
+        log('Refreshing stale lineup in the background')
+        self.__lock.acquire()
+        try:
+            try:
+                streams = self.provider.tryGetStreams()
+            except Exception, err:
+                log('Background lineup refresh failed, keeping cached lineup: %s',
+                    err, level=WARNING)
+                return
+        finally:
+            self.__lock.release()
+        self.__lineup.save(streams)
+        self.allstreams = streams
+
     def validateStream(self, stream=None):
         '''checks if stream is valid if theres no agument then it checks 
         self.__stream'''
         if stream is None: 
             stream = self.__stream
 
-	log('Validationg stream %s' % stream)
+	log('Validationg stream %s', stream)
         if len(self.allstreams) < 5:
             self.allstreams = self.getStreams()
         if stream not in self.allstreams:
-            log('stream %s invalid' % stream)
+            log('stream %s invalid', stream)
             raise InvalidStream
 
     def setStreamByLongName(self, longName):
         '''Sets the currently playing stream to the stream refered to by
         longname'''
 
-        log('Setting Stream to %s' % longName)
+        log('Setting Stream to %s', longName)
         #print 'setStreamByLongName:',longName #DEBUG
         if len(self.allstreams) < 5:
             self.allstreams = self.getStreams()
             
+        if not self.__findStream(longName):
+            if not self.__lineup.stale() or \
+               time.time() - self.__rechecked < self.__recheck:
+                raise InvalidStream
+            # The cached lineup may be out of date, check the website
+            log('Stream %s not in stale lineup, refreshing', longName)
+            self.__rechecked = time.time()
+            self.allstreams = self.fetchStreams()
+            if not self.__findStream(longName):
+                raise InvalidStream
+
+    def findStream(self, longName, load=True):
+        '''Returns the stream in the lineup refered to by longName or None
+
+        load: get the lineup if it isn't loaded yet, otherwise a name is
+        only looked up in a lineup that is loaded already'''
+        if len(self.allstreams) < 5 and load:
+            self.allstreams = self.getStreams()
         for stream in self.allstreams:
           if stream['longName'].lower().strip() == longName.lower():
-            #print 'setStreamByLongName, stream:',stream #DEBUG
-            self.__stream = stream
-            log('Stream set to %s' % stream)
-            return
-        raise InvalidStream
+            return stream
+        return None
 
-    def getNowPlaying(self):
-        '''return a dictionary for current song/artist per channel'''
-        nowplaying = {}
-        url = 'http://www.siriusxm.com/padData/pad_provider.jsp?all_channels=y'
+    def __findStream(self, longName):
+        '''Sets the stream refered to by longName, returns False if there is
+        no such stream in the lineup'''
+        stream = self.findStream(longName)
+        if stream is None:
+            return False
+        self.__stream = stream
+        log('Stream set to %s', stream)
+        return True
+
+    def getNowPlaying(self, channel=None):
+        '''return a dictionary for current song/artist per channel
+
+        channel: stop reading the feed once this channel has been found'''
         try:
-            sirius_xml = parse(urllib.urlopen(url))
+            (data, version) = self.__nowplaying.get()
+            # The body is kept for revalidation anyway, a read only
+            # cStringIO shares it instead of copying, and only the tree
+            # is kept small by parsing one event at a time
+            nowplaying = parseNowPlaying(StringIO(data), channel)
         except Exception:
-            log("ERROR getting now-playing list: %s" % url)
+            log("ERROR getting now-playing list: %s", self.__nowplaying.url,
+                level=ERROR)
             return "FAILURE"
 
-        for channels in sirius_xml.getElementsByTagName('event'):
-            channel = channels.getElementsByTagName('channelname')[0].firstChild.data
-            song = channels.getElementsByTagName('songtitle')[0].firstChild.data
-            artist = channels.getElementsByTagName('artist')[0].firstChild.data
-            nowplaying[str(channel).strip().lower()] = {'artist': artist, 'song': song}
-        sirius_xml.unlink()
-
         return nowplaying
 
-    def nowPlaying(self):
-        '''return a dictionary of info about whats currently playing'''
+    def nowPlaying(self, longName=None):
+        '''return a dictionary of info about whats currently playing
+
+        longName: stream to report on, defaults to the current stream
+
+        A song that is new for the stream is added to the history, use
+        lookupNowPlaying to just ask'''
         nowplaying = {}
-        channel = None
-        stream = self.__stream['longName'].lower() 
-        nowPlayingInfo = self.getNowPlaying()
-        if stream in nowPlayingInfo:
-            channel = stream
-        else:
-            for info in nowPlayingInfo:
-                #Remove all non letter characters then compare
-                cleanInfo = re.sub("[\W]", "", info)
-                cleanStream = re.sub("[\W]", "", stream)
-                if cleanStream == cleanInfo or cleanStream in cleanInfo:
-                    channel = info
-                    break
+        if longName is None:
+            longName = self.__stream['longName']
+        stream = longName.lower()
+        (channel, song, artist) = self.lookupNowPlaying(longName)
 
         if channel:
-            channel = channel.strip()
-            song = nowPlayingInfo[channel]['song']
-            artist = nowPlayingInfo[channel]['artist']
             nowplaying['playing'] = song + ', ' + artist
             nowplaying['longName'] = channel.title()
         else:
@@ -249,13 +435,48 @@ class Sirius(object):
         nowplaying['logfmt'] = '%s %s: %s' % (time.strftime('%y %m|%d %H:%M'),
                 nowplaying['longName'], nowplaying['playing'])
 
-        if nowplaying['playing'] != self.playing:
+        if nowplaying['playing'] != self.playing.get(stream):
             nowplaying['new'] = True
-            self.playing = nowplaying['playing']
-            logfd = open(self.playlist,'a')
-            nowplayinglog = nowplaying['logfmt'].encode("utf-8")
-            logfd.write("%s\n" % nowplayinglog)
-            logfd.close()
+            self.playing[stream] = nowplaying['playing']
+            if channel:
+                self.history.add(time.time(), nowplaying['longName'],
+                                 artist, song)
         else:
             nowplaying['new'] = False
         return nowplaying
+
+    def lookupNowPlaying(self, longName):
+        '''Returns a tuple of the channel, song and artist playing on the
+        stream longName, all None if the feed has nothing for it'''
+        channel = None
+        stream = longName.lower()
+        # configure() may drop the index meanwhile
+        channels = self.__channels
+        if channels is not None:
+            channel = channels.resolve(stream)
+
+        nowPlayingInfo = self.getNowPlaying(channel)
+        if nowPlayingInfo == "FAILURE":
+            channel = None
+        elif channel not in nowPlayingInfo:
+            # Either there is no index yet or the feed changed its channels
+            if channel is not None:
+                nowPlayingInfo = self.getNowPlaying()
+            self.__indexChannels(nowPlayingInfo)
+            channel = self.__channels.resolve(stream)
+
+        if not channel:
+            return (None, None, None)
+        channel = channel.strip()
+        return (channel, nowPlayingInfo[channel]['song'],
+                nowPlayingInfo[channel]['artist'])
+
+    def __indexChannels(self, nowPlayingInfo):
+        '''Rebuild the channel index if the feed has different channels'''
+        channels = frozenset(nowPlayingInfo)
+        if self.__channels is not None and self.__channels.channels == channels:
+            return
+        log('Indexing %d now-playing channels', len(channels))
+        self.__channels = ChannelIndex(channels, self.__aliases)
+        self.__channels.precompute(
+            [stream['longName'].lower() for stream in self.allstreams])
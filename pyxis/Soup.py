@@ -0,0 +1,51 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+import sys
+
+__soup = None
+
+def BeautifulSoup(*args, **kwargs):
+    """Parse markup with BeautifulSoup
+
+    BeautifulSoup is only imported the first time a page has to be parsed,
+    so commands that never parse a page don't pay for loading it."""
+    global __soup
+    if __soup is None:
+        __soup = __load()
+    return __soup(*args, **kwargs)
+
+def __load():
+    try:
+        from BeautifulSoup import BeautifulSoup
+    except ImportError:
+        print 'Missing dependency: BeautifulSoup'
+        print ' to install run `easy_install BeautifulSoup`'
+        print ' or if you have apt try '
+        print ' apt-get install python-beautifulsoup'
+        print ''
+        print 'or download the beautifulsoup.py module and put it in the current directory.'
+        print 'http://www.crummy.com/software/BeautifulSoup/'
+        sys.exit(300)
+
+    if 'find' not in dir(BeautifulSoup):
+        print 'Pyxis requires a newer version of Beautiful soup:'
+        print 'Get the latest version from: http://www.crummy.com/software/BeautifulSoup/'
+        sys.exit(301)
+
+    return BeautifulSoup
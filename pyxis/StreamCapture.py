@@ -0,0 +1,205 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+import re
+import struct
+import urllib2
+import threading
+from Debug import log, ERROR
+
+__ref = re.compile(r'<(?:entry)?ref\s+href\s*=\s*["\']([^"\']+)["\']', re.I)
+
+def asxRefs(data):
+    """Returns the urls referenced by an ASX playlist in order"""
+    return [url.strip() for url in __ref.findall(data)]
+
+def isAsx(data):
+    return data.lstrip()[:4].lower() == '<asx'
+
+# Start of the ASF header object and the file properties object
+asfHeaderGuid = '\x30\x26\xb2\x75\x8e\x66\xcf\x11\xa6\xd9\x00\xaa\x00\x62\xce\x6c'
+asfFilePropertiesGuid = '\xa1\xdc\xab\x8c\x47\xa9\xcf\x11\x8e\xe4\x00\xc0\x0c\x20\x53\x65'
+
+def asfPacketSize(header):
+    """Returns the data packet size set by an ASF header, 0 if unknown"""
+    start = header.find(asfFilePropertiesGuid)
+    # The minimum packet size follows the 24 byte object header, the file
+    # id, 5 64 bit fields, preroll and the flags
+    offset = start + 92
+    if start < 0 or len(header) < offset + 4:
+        return 0
+    return struct.unpack('<I', header[offset:offset + 4])[0]
+
+class ChunkReader(object):
+    """Reads the chunks a server sends for MMS over HTTP
+
+    Every chunk starts with '$', a type letter and the little endian length
+    of the rest. Header ($H) and data ($D) chunks carry 8 more bytes of
+    sequence number, flags and the length again before their payload."""
+
+    def __init__(self, handle, data=''):
+        """handle: the stream
+        data: bytes already read from handle"""
+        self.handle = handle
+        self.__pending = data
+
+    def read(self, size):
+        """Returns exactly size bytes, fewer only at the end of the stream"""
+        data = self.__pending[:size]
+        self.__pending = self.__pending[size:]
+        while len(data) < size:
+            more = self.handle.read(size - len(data))
+            if not more:
+                break
+            data = data + more
+        return data
+
+    def next(self):
+        """Returns a tuple of the type letter and payload of the next
+        chunk, None at the end of the stream"""
+        header = self.read(4)
+        if len(header) < 4:
+            return None
+        if header[0] != '$':
+            raise IOError('Not an MMS over HTTP chunk: %r' % header)
+        (length,) = struct.unpack('<H', header[2:4])
+        payload = self.read(length)
+        if len(payload) < length:
+            return None
+        if header[1] in 'HD':
+            payload = payload[8:]
+        return (header[1], payload)
+
+class StreamCapture(object):
+    """Copies a stream to a file without decoding it
+
+    The url may be an ASX playlist, a url to one, or the stream itself. The
+    stream is fetched the way mplayer does (MMS over HTTP). The ASF header
+    and data packets are taken out of the chunks they are sent in and
+    written once, packets padded to the size the header sets, so the file
+    holds the original compressed ASF stream. A server that sends plain
+    ASF is copied as is."""
+
+    BUFSIZE = 256 * 1024
+
+    def __init__(self, url, filename, timeout=30):
+        """url: what the provider returned from tryGetAsxURL
+        filename: file the stream is written to
+        timeout: seconds to wait for data before giving up"""
+        self.url = url
+        self.filename = filename
+        self.timeout = timeout
+        self.written = 0
+        self.error = None
+        self.__stop = threading.Event()
+        self.__thread = None
+        # Not the installed opener, that one reads whole responses into memory
+        self.__opener = urllib2.build_opener()
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.__run)
+        self.__thread.setDaemon(True)
+        self.__thread.start()
+
+    def running(self):
+        return self.__thread is not None and self.__thread.isAlive()
+
+    def stop(self):
+        """Stop capturing, the file is closed after the current read"""
+        self.__stop.set()
+
+    def open(self, url, depth=0):
+        """Follow ASX playlists until a stream is found
+
+        returns: tuple of the stream handle and the bytes already read"""
+        if isAsx(url):
+            return self.__follow(url, depth)
+
+        url = re.sub(r'^mms[th]?://', 'http://', url)
+        handle = self.__open(url)
+        data = handle.read(4096)
+        if not isAsx(data):
+            return (handle, data)
+        data = data + handle.read()
+        handle.close()
+        return self.__follow(data, depth)
+
+    def __follow(self, playlist, depth):
+        if depth > 3:
+            raise IOError('Too many nested playlists')
+        for ref in asxRefs(playlist):
+            if ref.startswith('http://') or ref.startswith('mms'):
+                return self.open(ref, depth + 1)
+        raise IOError('No playable entry in playlist')
+
+    def __open(self, url):
+        req = urllib2.Request(url, None, {'User-agent': 'NSPlayer/4.1.0.3856',
+                                          'Pragma': 'xPlayStrm=1'})
+        return self.__opener.open(req, timeout=self.timeout)
+
+    def __run(self):
+        try:
+            (handle, data) = self.open(self.url)
+            log('Capturing %s to %s', handle.geturl(), self.filename)
+            fd = open(self.filename, 'wb', self.BUFSIZE)
+            try:
+                if data.startswith('$'):
+                    self.__unchunk(ChunkReader(handle, data), fd)
+                else:
+                    self.__copy(handle, data, fd)
+            finally:
+                fd.close()
+                handle.close()
+        except Exception, err:
+            self.error = err
+            log('Capture of %s failed: %s', self.url, err, level=ERROR)
+        log('Captured %d bytes to %s', self.written, self.filename)
+
+    def __write(self, fd, data):
+        fd.write(data)
+        self.written += len(data)
+
+    def __copy(self, handle, data, fd):
+        self.__write(fd, data)
+        while not self.__stop.isSet():
+            data = handle.read(self.BUFSIZE)
+            if not data:
+                break
+            self.__write(fd, data)
+
+    def __unchunk(self, reader, fd):
+        header = ''
+        packetsize = None
+        while not self.__stop.isSet():
+            chunk = reader.next()
+            if chunk is None or chunk[0] == 'E':
+                break
+            (type, payload) = chunk
+            if type == 'H' and packetsize is None:
+                # A large header comes in several chunks, after a stream
+                # change ($C) it is sent again and skipped
+                header = header + payload
+            elif type == 'D':
+                if packetsize is None:
+                    packetsize = asfPacketSize(header)
+                    self.__write(fd, header)
+                self.__write(fd, payload)
+                if len(payload) < packetsize:
+                    self.__write(fd, '\0' * (packetsize - len(payload)))
+        if packetsize is None:
+            self.__write(fd, header)
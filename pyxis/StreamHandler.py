@@ -18,29 +18,93 @@
 
 import sys, os, subprocess
 import fcntl
+import errno
+import re
+import time
 import datetime
-from Config import Config
+from collections import deque
+from Config import getConfig, toBool
 from Debug import log, logfile
+from StreamCapture import StreamCapture
+
+__cachefill = re.compile(r'Cache fill:\s*([\d.]+)%')
+__exiting = re.compile(r'^Exiting\.\.\.\s*\((.*)\)')
+__failure = re.compile(r'^(Failed to|Cannot|Error|No stream found|'
+                       r'Connection refused|Server returned [45])')
+
+def parseOutput(line):
+    """Turn a line of mplayer output into an event dictionary
+
+    returns: None for lines that are not of interest"""
+    line = line.strip()
+    if not line:
+        return None
+
+    match = __cachefill.search(line)
+    if match:
+        return {'event': 'cache', 'fill': float(match.group(1))}
+    if line.startswith('ANS_'):
+        (name, sep, value) = line[4:].partition('=')
+        return {'event': 'answer', 'name': name, 'value': value}
+    if line.startswith('Starting playback'):
+        return {'event': 'playing'}
+    match = __exiting.match(line)
+    if match:
+        return {'event': 'exit', 'reason': match.group(1)}
+    if __failure.match(line):
+        return {'event': 'error', 'message': line}
+    return None
 
 class StreamHandler(object):
-    """Handles playing a stream via an external process."""
+    """Handles playing a stream via an external process.
+
+    In persistent mode mplayer is started with -idle and kept running,
+    another stream is played by sending it a loadfile command. Whether it
+    is playing is asked with get_property path, which mplayer only answers
+    with a path while a stream is loaded. A player that died or stopped
+    answering is replaced by a new one."""
+
+    # Seconds an unanswered query may take before the player is replaced
+    TIMEOUT = 30
+
     def __init__(self, opts):
 
-        config = Config()
+        config = getConfig()
         self.settings = config.mediaplayer
         self.location = None
         self.proc = None
+        self.capture = None
         self.options = opts
+        self.__output = ''
+        self.__eof = False
+        self.__events = deque(maxlen=100)
+        self.cachefill = None
+        self.error = None
+        self.native = False
+        self.idle = False
+        self.softvol = False
+        self.muted = False
+        self.__queries = []
+        self.__stale = 0
+        options = self.settings.options
 
         if self.options.record:
-            if not os.path.isdir(config.recordings.directory):
-                os.makedirs(config.recordings.directory)
-            self.settings.options = self.settings.options + ' ' + self.settings.record
-            self.settings.options = self.settings.options + config.recordings.directory
+            self.directory = config.recordings.directory
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            options = options + ' ' + self.settings.record + self.directory
+            # Save the stream as is instead of having mplayer decode it
+            self.native = toBool(config.recordings.get('native', 'False'))
 
-        self.command = "%s %s" % (self.settings.command, self.settings.options)
+        self.command = "%s %s" % (self.settings.command, options)
 
-        if os.path.isfile(self.settings.command) == False:
+        # Answers to slave commands are only printed at the info level
+        self.persistent = not self.options.record and '-slave' in options and \
+            toBool(self.settings.get('persistent', 'Yes'))
+        if self.persistent:
+            self.command = self.command + ' -idle -msglevel global=4'
+
+        if not self.native and os.path.isfile(self.settings.command) == False:
             print "Cannot find media player: " + self.settings.command
             print "Please check your Pyxis media player settings in " + config.conffile
             sys.exit(200)
@@ -55,14 +119,116 @@ class StreamHandler(object):
                         stdin=subprocess.PIPE, stdout=subprocess.PIPE,
                         stderr=subprocess.STDOUT, close_fds=True)
         fcntl.fcntl(self.proc.stdout, fcntl.F_SETFL, os.O_NONBLOCK)
+        self.__output = ''
+        self.__eof = False
+        self.__queries = []
+        self.__stale = 0
+        self.idle = False
+        self.__reset()
         return (self.proc.stdin, self.proc.stdout)
 
+    def __reset(self):
+        """Forget the state of the previous stream"""
+        self.__events.clear()
+        self.cachefill = None
+        self.error = None
+
+    def output(self):
+        """Returns the pipe the player writes its output to, or None"""
+        if self.proc:
+            return self.proc.stdout
+        return None
+
+    def drain(self):
+        """Read whatever the player wrote so far without blocking
+
+        Parsed events are queued for events(). Reading the pipe keeps the
+        player from stalling on a full pipe buffer."""
+        if not self.proc or self.__eof:
+            return
+
+        chunks = []
+        fd = self.proc.stdout.fileno()
+        while True:
+            try:
+                data = os.read(fd, 4096)
+            except OSError, err:
+                if err.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                raise
+            if not data:
+                self.__eof = True
+                break
+            chunks.append(data)
+
+        # Status lines such as the cache fill end in \r instead of \n
+        lines = re.split(r'[\r\n]', self.__output + ''.join(chunks))
+        self.__output = lines.pop()
+        if self.__eof:
+            lines.append(self.__output)
+            self.__output = ''
+
+        for line in lines:
+            event = parseOutput(line)
+            if event is not None:
+                self.__event(event)
+        if self.__eof:
+            # The player closed its output, it is exiting. It is reaped by
+            # playing() on a later tick rather than waited for here
+            self.proc.poll()
+            self.__event({'event': 'eof'})
+
+    def events(self):
+        """Returns the list of events since the last call"""
+        self.drain()
+        events = list(self.__events)
+        self.__events.clear()
+        return events
+
+    def __event(self, event):
+        if event['event'] == 'answer' and self.__queries:
+            self.__queries.pop(0)
+            if self.__stale:
+                # Asked before the current stream was loaded
+                self.__stale -= 1
+            else:
+                self.idle = event['name'] != 'path'
+            return
+        if event['event'] == 'cache':
+            self.cachefill = event['fill']
+        else:
+            if event['event'] == 'error':
+                self.error = event['message']
+            log('mplayer event: %s', event)
+        self.__events.append(event)
+
     def playing(self):
+        if self.capture:
+            return self.capture.running()
         if self.proc:
+            self.drain()
             self.proc.poll()
-            return self.proc.returncode is None
+            if self.proc.returncode is not None:
+                return False
+            if self.persistent and not self.__queries:
+                self.__query()
+            return not self.idle
         return False
 
+    def healthy(self):
+        """Returns True if the persistent player can play another stream"""
+        if not self.proc or self.proc.poll() is not None:
+            return False
+        if self.__queries and time.time() - self.__queries[0] > self.TIMEOUT:
+            log('mplayer stopped answering, replacing it')
+            return False
+        return True
+
+    def __query(self):
+        """Ask the player what it is playing, see __event"""
+        self.cmd('get_property path')
+        self.__queries.append(time.time())
+
     def play(self, url, stream):
         """Plays the given url
 
@@ -72,19 +238,47 @@ class StreamHandler(object):
             print "Already playing!"
             return
 
-        log("Starting mplayer...")
         if self.options.record:
             if self.options.output:
                 filename = self.options.output
             else:
                 stream = stream.replace(' ','') + '_'
                 now = datetime.datetime.now()
-                filename = stream + now.strftime("%Y-%m-%d_%H-%M-%S") + '.wav'
-            
+                filename = stream + now.strftime("%Y-%m-%d_%H-%M-%S")
+                if self.native:
+                    filename = filename + '.asf'
+                else:
+                    filename = filename + '.wav'
+
+            if self.native:
+                self.capture = StreamCapture(url,
+                                    os.path.join(self.directory, filename))
+                self.capture.start()
+                return
+
+            log("Starting mplayer...")
             mpc = "%s '%s'" % (self.command + filename, url)
+        elif self.persistent and self.healthy():
+            log('Loading %s into the running mplayer', url)
+            self.__reset()
+            self.__stale = len(self.__queries)
+            self.idle = False
+            self.cmd('loadfile "%s"' % url)
+            if self.softvol:
+                self.__volume()
+            self.__query()
+            return
         else:
-            mpc = "%s '%s'" % (self.command, url)
-        log('mpc = %s' % mpc)
+            self.close()
+            log("Starting mplayer...")
+            command = self.command
+            if self.softvol:
+                # Mute only this player, not the sound card
+                command = command + ' -softvol -softvol-max 100'
+                if self.muted:
+                    command = command + ' -volume 0'
+            mpc = "%s '%s'" % (command, url)
+        log('mpc = %s', mpc)
         self.pipeopen(mpc)
 
     def cmd(self, command):
@@ -99,9 +293,34 @@ class StreamHandler(object):
         except StandardError:
            return
 
+    def mute(self, muted):
+        """Mute or unmute the player, only works with softvol set"""
+        self.muted = muted
+        if self.softvol:
+            self.__volume()
+
+    def __volume(self):
+        if self.muted:
+            self.cmd('volume 0 1')
+        else:
+            self.cmd('volume 100 1')
+
+    def stop(self):
+        """Stop playing, a persistent player is kept for the next stream"""
+        if self.persistent and self.healthy():
+            self.cmd('stop')
+            self.idle = True
+            self.__stale = len(self.__queries)
+        else:
+            self.close()
+
     def close(self):
         """Cleanly closes any IPC resources to process"""
 
+        if self.capture:
+            self.capture.stop()
+            self.capture = None
+
         self.cmd("quit")
 
         try:
@@ -0,0 +1,117 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+import re
+from Debug import log, WARNING
+
+# Comments and scripts are skipped so options inside them are not matched,
+# an option tag is captured with the text that follows it.
+__tokens = re.compile(r'<!--.*?-->|<script\b.*?</script\s*>|'
+                      r'<option\b([^>]*)>([^<]*)(<[a-zA-Z/!]|<|$)',
+                      re.S | re.I)
+__attributes = re.compile(r'\s*([\w:.-]+)(?:\s*=\s*(?:"([^"]*)"|'
+                          r"'([^']*)'|([^\s\"'>]+)))?", re.S)
+
+class MalformedMarkup(Exception):
+    """The page can't be read without the tolerant parser"""
+    pass
+
+def makeStream(value, text):
+    """Returns the stream record for an option of the channel list"""
+    chunks = value.split('|')
+    return {
+        'channelKey': chunks[2],
+        'genreKey':  chunks[1],
+        'categoryKey': chunks[0],
+        'selectedStream': value,
+        'longName': text.split(';')[-1].lower()
+        }
+
+def decode(text):
+    """Decode text the way BeautifulSoup most likely would"""
+    try:
+        return text.decode('utf-8')
+    except UnicodeDecodeError:
+        return text.decode('windows-1252', 'replace')
+
+def parseAttributes(attrs):
+    """Returns a dict of the attributes of a tag, attrs is what is between
+    the tag name and the closing >"""
+    attrs = attrs.rstrip().rstrip('/')
+    result = {}
+    end = 0
+    for match in __attributes.finditer(attrs):
+        if match.start() != end:
+            break
+        end = match.end()
+        value = match.group(2)
+        if value is None:
+            value = match.group(3)
+        if value is None:
+            value = match.group(4)
+        result[match.group(1).lower()] = value
+    if end != len(attrs):
+        raise MalformedMarkup(attrs)
+    return result
+
+def extractStreams(data):
+    """Returns the streams of the channel select list in data
+
+    Only option tags are tokenized, the rest of the page is skipped, so
+    the page doesn't have to be sanitized first. MalformedMarkup is raised
+    when an option can't be read with certainty."""
+    streams = []
+    for match in __tokens.finditer(data):
+        (attrs, text, following) = match.groups()
+        if attrs is None:
+            continue
+        if following == '<':
+            # A bare < in the text
+            raise MalformedMarkup(match.group(0))
+        value = parseAttributes(attrs).get('value')
+        if value is None or value.find('|') == -1:
+            continue
+        if not text or value.count('|') < 2:
+            raise MalformedMarkup(match.group(0))
+        streams.append(makeStream(decode(value), decode(text)))
+    return streams
+
+def soupStreams(data):
+    """Returns the streams of the channel select list in data using
+    BeautifulSoup, data should be sanitized first"""
+    from Soup import BeautifulSoup
+    streams = []
+    soup = BeautifulSoup(data)
+    for catstrm in soup.findAll('option'):
+        value = catstrm.get('value', '')
+        if value.find('|') == -1 or not catstrm.contents:
+            continue
+        streams.append(makeStream(value, unicode(catstrm.contents[0])))
+    return streams
+
+def parseStreams(data, sanitize):
+    """Returns the streams of the channel select list in data
+
+    sanitize: function fixing data for BeautifulSoup, only called when the
+    page has to be parsed by it"""
+    try:
+        return extractStreams(data)
+    except MalformedMarkup, err:
+        log('Falling back to BeautifulSoup for the channel list: %r', str(err)[:80],
+            level=WARNING)
+    return soupStreams(sanitize(data))
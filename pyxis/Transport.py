@@ -0,0 +1,149 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+import urllib
+import urllib2
+import httplib
+import socket
+import gzip
+import zlib
+import threading
+from StringIO import StringIO
+from Debug import log
+
+def makeResponse(data, headers, url, code, msg):
+    """Build a urllib2 style response around an in memory body"""
+    response = urllib.addinfourl(StringIO(data), headers, url)
+    response.code = code
+    response.msg = msg
+    return response
+
+class KeepAliveHandler(urllib2.HTTPHandler):
+    """urllib2 handler that reuses connections to the same host
+
+    Idle connections are kept in a pool per host (or per proxy when
+    http_proxy is set). Responses are read completely before the connection
+    goes back to the pool, so they are returned as in memory files."""
+
+    def __init__(self):
+        urllib2.HTTPHandler.__init__(self)
+        self.__pool = {}
+        self.__lock = threading.Lock()
+
+    def http_open(self, req):
+        host = req.get_host()
+        if not host:
+            raise urllib2.URLError('no host given')
+
+        (conn, reused) = self.__get(host)
+        try:
+            response = self.__request(conn, req)
+        except (socket.error, httplib.HTTPException), err:
+            conn.close()
+            if not reused:
+                raise urllib2.URLError(err)
+            # The server closed the idle connection, try once on a new one
+            log('Stale connection to %s, reconnecting', host)
+            conn = httplib.HTTPConnection(host)
+            try:
+                response = self.__request(conn, req)
+            except (socket.error, httplib.HTTPException), err:
+                conn.close()
+                raise urllib2.URLError(err)
+
+        try:
+            data = response.read()
+        except (socket.error, httplib.HTTPException), err:
+            conn.close()
+            raise urllib2.URLError(err)
+
+        if response.will_close:
+            conn.close()
+        else:
+            self.__put(host, conn)
+
+        return makeResponse(data, response.msg, req.get_full_url(),
+                            response.status, response.reason)
+
+    def close(self):
+        """Close all of the idle connections"""
+        self.__lock.acquire()
+        try:
+            for connections in self.__pool.values():
+                for conn in connections:
+                    conn.close()
+            self.__pool = {}
+        finally:
+            self.__lock.release()
+
+    def __get(self, host):
+        """Returns a tuple of a connection to host and whether it was pooled"""
+        self.__lock.acquire()
+        try:
+            connections = self.__pool.get(host)
+            if connections:
+                return (connections.pop(), True)
+        finally:
+            self.__lock.release()
+        return (httplib.HTTPConnection(host), False)
+
+    def __put(self, host, conn):
+        self.__lock.acquire()
+        try:
+            self.__pool.setdefault(host, []).append(conn)
+        finally:
+            self.__lock.release()
+
+    def __request(self, conn, req):
+        headers = dict(req.unredirected_hdrs)
+        for (name, value) in req.headers.items():
+            if name not in headers:
+                headers[name] = value
+        headers = dict([(name.title(), value) for (name, value) in headers.items()])
+
+        conn.request(req.get_method(), req.get_selector(), req.get_data(), headers)
+        return conn.getresponse()
+
+class CompressionProcessor(urllib2.BaseHandler):
+    """Asks for compressed responses and decodes them"""
+
+    def http_request(self, req):
+        if not req.has_header('Accept-encoding'):
+            req.add_unredirected_header('Accept-encoding', 'gzip, deflate')
+        return req
+
+    def http_response(self, req, response):
+        headers = response.info()
+        encoding = headers.get('Content-Encoding')
+        if encoding not in ('gzip', 'deflate'):
+            return response
+
+        data = response.read()
+        response.close()
+        if encoding == 'gzip':
+            data = gzip.GzipFile(fileobj=StringIO(data)).read()
+        else:
+            try:
+                data = zlib.decompress(data)
+            except zlib.error:
+                # Some servers send deflate without the zlib header
+                data = zlib.decompress(data, -zlib.MAX_WBITS)
+
+        del headers['Content-Encoding']
+        return makeResponse(data, headers, response.geturl(),
+                            response.code, response.msg)
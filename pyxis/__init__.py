@@ -2,11 +2,5 @@ __author__ = 'Corey Ling <kasuko@gmail.com>'
 __version__ = '''0.1'''
 __copyright__ =  '''(c)Corey Ling <kasuko@gmail.com>
                        Eli Criffield <elicriffield@gmail.com>'''
-#Sirius MUST be imported BEFORE the Providers for BeautifulSoup detection.
-from Config import *
-from Sirius import *
-from StreamHandler import *
-from Player import *
-from Interface import *
-from ProviderUSA import *
-from ProviderCanada import *
+# Modules are imported where they are used, importing the package
+# should not load all of them.
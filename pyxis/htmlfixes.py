@@ -1,14 +1,88 @@
-subs = (
+import re
+
+# Fixes for markup BeautifulSoup can't handle, per provider.
+# Each rule is (pattern, replacement, trigger), the rule is skipped for
+# pages that don't contain the trigger string. At any position the first
+# rule that matches wins, so specific rules go before generic ones.
+rules = {
     #Sirius USA
-    ('width="100"%"', 'width="100%"'),
+    'usa': (
+        ('width="100"%"', 'width="100%"', 'width="100"%"'),
+    ),
 
     #Sirius Canada
-    (r'style=["\']?(\{.*\})["\']?', r'style="\1" '),
-    (r'width=["\']?(\d+)["\']?', r'width="\1"'),
-    (r'width="100"%"', r'width="100%"'),
-    #(r'onclick=["\']?([^\s<>]*)["\']?', r'onclick=""'),
-    (r'onclick=location.href', r'href'),
+    'canada': (
+        (r'style=["\']?(\{.*\})["\']?', r'style="\1" ', 'style='),
+        # Also catches what the generic width fix below would turn into it
+        (r'width=["\']?100["\']?%"', r'width="100%"', '%"'),
+        # Widths that are quoted already are left alone
+        (r'width=(?!"\d+")["\']?(\d+)["\']?', r'width="\1"', 'width='),
+        #(r'onclick=["\']?([^\s<>]*)["\']?', r'onclick=""', 'onclick='),
+        (r'onclick=location.href', r'href', 'onclick=location.href'),
+    ),
+}
+
+class Sanitizer(object):
+    """Applies a set of rules in a single scan over the page
+
+    The patterns of the rules whose trigger is in the page are joined into
+    one pattern, compiled once for every combination that is seen. Patterns
+    should start with a literal, which lets re skip quickly to the places
+    where one of them could match, and must not contain a top level |."""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.__combined = {}
+
+    def __call__(self, data):
+        active = tuple([i for (i, rule) in enumerate(self.rules)
+                        if rule[2] in data])
+        if not active:
+            return data
+        (pattern, actions) = self.__compile(active)
+
+        def replace(match):
+            parts = actions[match.lastindex]
+            if len(parts) == 1:
+                return parts[0]
+            parts = parts[:]
+            for i in range(1, len(parts), 2):
+                parts[i] = match.group(parts[i]) or ''
+            return ''.join(parts)
+
+        return pattern.sub(replace, data)
+
+    def __compile(self, active):
+        """Returns the combined pattern and the replacement of each rule
+
+        An empty group closes every rule's branch, it is the last group of
+        a match so match.lastindex tells which rule matched. Replacements
+        are split into literals and the numbers of the groups between them,
+        renumbered to the combined pattern."""
+        if active in self.__combined:
+            return self.__combined[active]
+
+        branches = []
+        actions = {}
+        groups = 0
+        for i in active:
+            (pattern, replacement, trigger) = self.rules[i]
+            parts = re.split(r'\\(\d+)', replacement)
+            for j in range(1, len(parts), 2):
+                parts[j] = int(parts[j]) + groups
+            groups += re.compile(pattern).groups + 1
+            actions[groups] = parts
+            branches.append(pattern + '()')
+
+        self.__combined[active] = (re.compile('|'.join(branches)), actions)
+        return self.__combined[active]
+
+__sanitizers = {}
 
-)
+def sanitizer(provider):
+    """Returns the Sanitizer for the rules of provider"""
+    if provider not in __sanitizers:
+        __sanitizers[provider] = Sanitizer(rules[provider])
+    return __sanitizers[provider]
 
-__all__ = ['subs']
+__all__ = ['rules', 'Sanitizer', 'sanitizer']
@@ -0,0 +1,98 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+
+"""Helpers shared by the tests"""
+
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import BaseHTTPServer
+
+tests = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(tests, '..', 'pyxis'))
+
+from Config import reloadConfig
+
+def writeConfig(settings={}):
+    """Point pyxis at a new config directory with a minimal config
+
+    settings: options for the settings section
+
+    returns: the directory, remove it with removeConfig"""
+    directory = tempfile.mkdtemp(prefix='pyxis-test-')
+    os.environ['XDG_CONFIG_HOME'] = directory
+    os.makedirs(os.path.join(directory, 'pyxis'))
+    sections = {
+        'account': {'username': 'test', 'password': 'test',
+                    'login_type': 'subscriber', 'canada': 'False'},
+        'settings': dict({'bitrate': 'High', 'notifications': 'No'}, **settings),
+        'mediaplayer': {'command': '/bin/true', 'options': '', 'record': ''},
+        'recordings': {'directory': directory},
+        'debug': {'debug': 'False', 'directory': directory},
+        }
+    fd = open(os.path.join(directory, 'pyxis', 'pyxisrc'), 'w')
+    try:
+        for (section, options) in sections.items():
+            fd.write('[%s]\n' % section)
+            for (option, value) in options.items():
+                fd.write('%s = %s\n' % (option, value))
+    finally:
+        fd.close()
+    reloadConfig()
+    return directory
+
+def removeConfig(directory):
+    shutil.rmtree(directory, True)
+
+class StubServer(BaseHTTPServer.HTTPServer):
+    """HTTP server on a free local port answering from a dictionary
+
+    routes maps a path to a tuple of content type and body. The server runs
+    in a background thread until close() is called."""
+
+    allow_reuse_address = True
+
+    def __init__(self, routes):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), StubHandler)
+        self.routes = routes
+        self.url = 'http://127.0.0.1:%d' % self.server_address[1]
+        self.__thread = threading.Thread(target=self.serve_forever)
+        self.__thread.setDaemon(True)
+        self.__thread.start()
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+class StubHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path not in self.server.routes:
+            self.send_error(404)
+            return
+        (type, body) = self.server.routes[self.path]
+        self.send_response(200)
+        self.send_header('Content-Type', type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
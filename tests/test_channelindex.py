@@ -0,0 +1,92 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+"""Tests of matching stream names to now-playing channels
+
+Run the tests with: python -m unittest discover -s tests"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'pyxis'))
+from ChannelIndex import ChannelIndex, normalize
+
+channels = ['classic vinyl', 'classic rewind', 'the pulse', 'e street radio',
+            'hits 1', 'hits 1 uncut', 'rock hits 1', 'siriusxm love',
+            '90s on 9', '80s on 8']
+
+class NormalizeTest(unittest.TestCase):
+    def testIgnoresCaseSpacesAndPunctuation(self):
+        self.assertEqual(normalize('  E Street-Radio! '), 'estreetradio')
+        self.assertEqual(normalize('Hits #1'), 'hits1')
+
+class ResolveTest(unittest.TestCase):
+    def setUp(self):
+        self.index = ChannelIndex(channels, {'Love': 'SiriusXM Love',
+                                             'Nowhere': 'no such channel'})
+
+    def testExactName(self):
+        self.assertEqual(self.index.resolve('the pulse'), 'the pulse')
+
+    def testNormalizedName(self):
+        self.assertEqual(self.index.resolve('E-Street Radio'), 'e street radio')
+        self.assertEqual(self.index.resolve('thepulse'), 'the pulse')
+
+    def testAlias(self):
+        self.assertEqual(self.index.resolve('love'), 'siriusxm love')
+
+    def testAliasOfUnknownChannelIsIgnored(self):
+        self.assertEqual(self.index.resolve('nowhere'), None)
+
+    def testShortestChannelContainingNameWins(self):
+        self.assertEqual(self.index.resolve('hits'), 'hits 1')
+
+    def testTiesGoToAlphabeticallyFirst(self):
+        # 80son8 and 90son9 have the same length
+        self.assertEqual(self.index.resolve('s on'), '80s on 8')
+        self.assertEqual(self.index.resolve('classic'), 'classic vinyl')
+
+    def testNoMatch(self):
+        self.assertEqual(self.index.resolve('jazz'), None)
+
+    def testResultDoesNotDependOnChannelOrder(self):
+        index = ChannelIndex(reversed(channels))
+        for name in ('hits', 'classic', 's on', 'e street', 'uncut'):
+            self.assertEqual(index.resolve(name), self.index.resolve(name))
+
+class CacheTest(unittest.TestCase):
+    def testPrecomputedMatchesResolve(self):
+        index = ChannelIndex(channels)
+        index.precompute(['hits', 'classic', 'jazz'])
+        self.assertEqual(index.resolve('hits'), 'hits 1')
+        self.assertEqual(index.resolve('jazz'), None)
+
+    def testNewChannelSetResolvesAgain(self):
+        # Sirius builds a new index when the feed's channels change, the
+        # answers cached by the old one must not carry over
+        old = ChannelIndex(channels)
+        self.assertEqual(old.resolve('jazz'), None)
+        new = ChannelIndex(channels + ['real jazz'])
+        self.assertNotEqual(old.channels, new.channels)
+        self.assertEqual(new.resolve('jazz'), 'real jazz')
+        self.assertEqual(old.resolve('jazz'), None)
+
+if __name__ == '__main__':
+    unittest.main()
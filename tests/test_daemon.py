@@ -0,0 +1,289 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+
+"""Tests of the response cache, the routes and the control daemon"""
+
+import httplib
+import json
+import threading
+import time
+import unittest
+
+import support
+from Daemon import ResponseCache, RequestError, ControlServer, ControlDaemon
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.builds = []
+
+    def build(self, value, delay=0):
+        def build():
+            self.builds.append(value)
+            time.sleep(delay)
+            return value
+        return build
+
+    def testCached(self):
+        cache = ResponseCache(60)
+        self.assertEqual(cache.get('list', self.build([1])), '[1]')
+        self.assertEqual(cache.get('list', self.build([2])), '[1]')
+        self.assertEqual(self.builds, [[1]])
+
+    def testExpired(self):
+        cache = ResponseCache(0)
+        cache.get('list', self.build([1]))
+        self.assertEqual(cache.get('list', self.build([2])), '[2]')
+
+    def testInvalidate(self):
+        cache = ResponseCache(60)
+        cache.get('list', self.build([1]))
+        cache.invalidate()
+        self.assertEqual(cache.get('list', self.build([2])), '[2]')
+
+    def testOneBuildForConcurrentClients(self):
+        cache = ResponseCache(60)
+        results = []
+        def client():
+            results.append(cache.get('list', self.build([1], 0.2)))
+        threads = [threading.Thread(target=client) for i in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['[1]'] * 5)
+        self.assertEqual(self.builds, [[1]])
+
+    def testSlowKeyDoesNotBlockOthers(self):
+        cache = ResponseCache(60)
+        cache.get('status', self.build('ok'))
+        slow = threading.Thread(target=cache.get,
+                                args=('list', self.build([1], 0.5)))
+        slow.start()
+        time.sleep(0.1)
+        start = time.time()
+        self.assertEqual(cache.get('status', self.build('new')), '"ok"')
+        self.assertEqual(cache.get('other', self.build(2)), '2')
+        self.assert_(time.time() - start < 0.2)
+        slow.join()
+
+class FakeDaemon(object):
+    """Records the calls the routes make"""
+
+    def __init__(self):
+        self.calls = []
+
+    def status(self):
+        self.calls.append(('status', {}))
+        return '{}'
+
+    def list(self):
+        return '[]'
+
+    def nowPlaying(self, **args):
+        self.calls.append(('nowPlaying', args))
+        return '{}'
+
+    def play(self, **args):
+        self.calls.append(('play', args))
+        if args['station'] == 'nowhere':
+            raise RequestError(404, 'Invalid station name: nowhere')
+        if args['station'] == 'broken':
+            raise ValueError('broken')
+        return '{}'
+
+    def stop(self):
+        self.calls.append(('stop', {}))
+        return '{}'
+
+    def reload(self):
+        return '{}'
+
+class RouteTest(unittest.TestCase):
+    def setUp(self):
+        self.daemon = FakeDaemon()
+        self.server = ControlServer(('127.0.0.1', 0), self.daemon)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.setDaemon(True)
+        thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def request(self, method, path, body=None, type='application/json'):
+        connection = httplib.HTTPConnection(*self.server.server_address[:2])
+        headers = {}
+        if type is not None:
+            headers['Content-Type'] = type
+        try:
+            connection.request(method, path, body, headers)
+            response = connection.getresponse()
+            return (response.status, response.read())
+        finally:
+            connection.close()
+
+    def testGet(self):
+        self.assertEqual(self.request('GET', '/status/'), (200, '{}'))
+        self.assertEqual(self.request('GET', '/nowplaying?station=octane')[0],
+                         200)
+        self.assertEqual(self.daemon.calls, [('status', {}),
+                         ('nowPlaying', {'station': 'octane'})])
+
+    def testUnknownRoute(self):
+        self.assertEqual(self.request('GET', '/nothing')[0], 404)
+        self.assertEqual(self.request('GET', '/play')[0], 405)
+        self.assertEqual(self.request('POST', '/status')[0], 405)
+
+    def testPlayFromBody(self):
+        (code, data) = self.request('POST', '/play',
+                                    json.dumps({'station': 'octane'}))
+        self.assertEqual(code, 200)
+        self.assertEqual(self.daemon.calls, [('play', {'station': 'octane'})])
+
+    def testPlayFromQuery(self):
+        self.assertEqual(self.request('POST', '/play?station=octane')[0], 200)
+        self.assertEqual(self.request('POST', '/stop')[0], 200)
+        self.assertEqual(self.daemon.calls, [('play', {'station': 'octane'}),
+                                             ('stop', {})])
+
+    def testPostRequiresJSON(self):
+        for type in (None, 'application/x-www-form-urlencoded', 'text/plain'):
+            (code, data) = self.request('POST', '/play', 'station=octane',
+                                        type)
+            self.assertEqual(code, 415)
+            self.assertEqual(self.request('POST', '/stop', '', type)[0], 415)
+        self.assertEqual(self.daemon.calls, [])
+        self.assertEqual(self.request('POST', '/stop', '',
+                         'application/json; charset=utf-8')[0], 200)
+
+    def testInvalidBody(self):
+        self.assertEqual(self.request('POST', '/play', 'station=octane')[0], 400)
+        self.assertEqual(self.request('POST', '/play', '["octane"]')[0], 400)
+        self.assertEqual(self.request('POST', '/play', '{"station": 1}')[0], 400)
+        self.assertEqual(self.request('POST', '/play', '{}')[0], 400)
+        self.assertEqual(self.daemon.calls, [])
+
+    def testErrors(self):
+        (code, data) = self.request('POST', '/play?station=nowhere')
+        self.assertEqual(code, 404)
+        self.assertEqual(json.loads(data),
+                         {'error': 'Invalid station name: nowhere'})
+        self.assertEqual(self.request('POST', '/play?station=broken')[0], 500)
+
+class FakeSirius(object):
+    def __init__(self):
+        self.stream = {'longName': 'octane', 'channelKey': 'octane',
+                       'genreKey': 'rock', 'categoryKey': 'music'}
+        self.urls = 0
+        self.history = []
+        self.slow = threading.Event()
+
+    def findStream(self, name):
+        if name == self.stream['longName']:
+            return self.stream
+        return None
+
+    def getAsxURL(self, stream):
+        self.urls += 1
+        self.slow.wait(5)
+        return 'http://127.0.0.1/octane'
+
+    def invalidateAsxURL(self, stream):
+        pass
+
+    def lookupNowPlaying(self, longName):
+        return ('octane', 'Song', 'Artist')
+
+    def nowPlaying(self, longName):
+        self.history.append(longName)
+        return {'new': False}
+
+class FakePlayer(object):
+    def __init__(self):
+        self.played = []
+        self.limit = 1
+        self.checked = 0
+
+    def checkStandby(self):
+        self.checked += 1
+
+    def playing(self):
+        return bool(self.played)
+
+    def standby(self):
+        return []
+
+    def play(self, url, name):
+        self.played.append(name)
+
+    def stop(self, switching=False):
+        self.played = []
+
+    def close(self):
+        pass
+
+class ControlDaemonTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = support.writeConfig()
+        self.sirius = FakeSirius()
+        self.player = FakePlayer()
+        self.daemon = ControlDaemon(self.sirius, self.player, None)
+
+    def tearDown(self):
+        self.sirius.slow.set()
+        support.removeConfig(self.directory)
+
+    def testStatusWhileStarting(self):
+        thread = threading.Thread(target=self.daemon.play, args=('octane',))
+        thread.start()
+        time.sleep(0.1)
+        start = time.time()
+        self.assertEqual(json.loads(self.daemon.status()),
+                         {'station': 'octane', 'playing': False, 'standby': []})
+        self.assert_(time.time() - start < 0.5)
+        # The watcher doesn't fetch the url a second time
+        self.daemon.watchPlayer()
+        self.sirius.slow.set()
+        thread.join()
+        self.assertEqual(self.sirius.urls, 1)
+        self.assertEqual(self.player.played, ['octane'])
+
+    def testCheckStandby(self):
+        self.daemon.checkStandby()
+        self.player.limit = 0
+        self.daemon.checkStandby()
+        self.assertEqual(self.player.checked, 1)
+
+    def testUnknownStation(self):
+        try:
+            self.daemon.play('nowhere')
+        except RequestError, err:
+            self.assertEqual(err.code, 404)
+        else:
+            self.fail('Playing an unknown station')
+        self.assertEqual(self.daemon.stream, None)
+
+    def testStationNowPlaying(self):
+        self.assertEqual(json.loads(self.daemon.nowPlaying('Octane')),
+                         {'station': 'octane', 'channel': 'Octane',
+                          'song': 'Song', 'artist': 'Artist'})
+        self.assertEqual(self.sirius.history, [])
+
+if __name__ == '__main__':
+    unittest.main()
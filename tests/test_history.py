@@ -0,0 +1,74 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+
+"""Tests of the song history"""
+
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+import support
+from History import History, parsePlaylistLine
+
+PLAYLIST = '''09 03|14 21:05 Deep Vinyl: Whole Lotta Love, Led Zeppelin
+09 03|14 21:09 ERROR: No channel information for stream deep vinyl
+09 03|14 21:12 Deep Vinyl: Black Dog, Led Zeppelin
+09 03|14 21:12 Deep Vinyl: Black Dog, Led Zeppelin
+'''
+
+class HistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='pyxis-test-')
+        self.history = History(os.path.join(self.directory, 'history.db'))
+        self.playlist = os.path.join(self.directory, 'playlist')
+        fd = open(self.playlist, 'w')
+        fd.write(PLAYLIST)
+        fd.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, True)
+
+    def testParseLine(self):
+        (when, channel, artist, title) = parsePlaylistLine(
+            '09 03|14 21:05 Deep Vinyl: Whole Lotta Love, Led Zeppelin')
+        self.assertEqual((channel, artist, title),
+                         ('Deep Vinyl', 'Led Zeppelin', 'Whole Lotta Love'))
+        self.assertEqual(time.localtime(when)[:5], (2009, 3, 14, 21, 5))
+        self.assertEqual(parsePlaylistLine(
+            '09 03|14 21:09 ERROR: No channel information'), None)
+
+    def testImportOnce(self):
+        self.assertEqual(self.history.importPlaylist(self.playlist), 2)
+        self.assertEqual(self.history.importPlaylist(self.playlist), 0)
+        plays = self.history.search(channel='deep vinyl')
+        self.assertEqual([title for (when, channel, artist, title) in plays],
+                         ['Black Dog', 'Whole Lotta Love'])
+
+    def testSearch(self):
+        self.history.add(100, 'Octane', 'Metallica', 'One')
+        self.history.add(200, 'Deep Vinyl', 'Led Zeppelin', 'Black Dog')
+        self.assertEqual(self.history.search(artist='metallica'),
+                         [(100, 'Octane', 'Metallica', 'One')])
+        self.assertEqual(len(self.history.search(title='%o%')), 2)
+        self.assertEqual(len(self.history.search(since=150)), 1)
+
+if __name__ == '__main__':
+    unittest.main()
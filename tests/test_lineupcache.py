@@ -0,0 +1,65 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+
+"""Tests of the on-disk lineup cache"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import support
+from LineupCache import LineupCache
+
+STREAMS = [{'longName': 'octane', 'channelKey': 'octane'}]
+
+class LineupCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='pyxis-test-')
+        self.filename = os.path.join(self.directory, 'lineup')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, True)
+
+    def testSaveAndLoad(self):
+        LineupCache(self.filename, 'usa', 60).save(STREAMS)
+        cache = LineupCache(self.filename, 'usa', 60)
+        self.assertEqual(cache.load(), STREAMS)
+        self.failIf(cache.stale())
+
+    def testOtherProvider(self):
+        LineupCache(self.filename, 'usa', 60).save(STREAMS)
+        self.assertEqual(LineupCache(self.filename, 'canada', 60).load(), None)
+
+    def testStale(self):
+        cache = LineupCache(self.filename, 'usa', 0)
+        cache.save(STREAMS)
+        cache.fetched -= 1
+        self.assert_(cache.stale())
+
+    def testUnwritable(self):
+        filename = os.path.join(self.directory, 'missing', 'lineup')
+        cache = LineupCache(filename, 'usa', 60)
+        cache.save(STREAMS)
+        self.assertEqual(cache.streams, STREAMS)
+        self.failIf(cache.stale())
+        self.failIf(os.path.exists(filename))
+
+if __name__ == '__main__':
+    unittest.main()
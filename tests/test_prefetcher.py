@@ -0,0 +1,70 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+
+"""Tests of the background prefetching of urls"""
+
+import threading
+import unittest
+
+import support
+from Prefetcher import Prefetcher
+
+class FakeSirius(object):
+    """A loaded lineup with a single stream"""
+
+    def __init__(self):
+        self.stream = {'longName': 'octane'}
+        self.loads = []
+        self.fetched = []
+        self.done = threading.Event()
+
+    def findStream(self, name, load=True):
+        self.loads.append(load)
+        if name == 'octane':
+            return self.stream
+        return None
+
+    def getAsxURL(self, stream, retry=None):
+        self.fetched.append((stream['longName'], retry))
+        self.done.set()
+        return 'http://127.0.0.1/octane'
+
+class PrefetcherTest(unittest.TestCase):
+    def setUp(self):
+        self.sirius = FakeSirius()
+        self.prefetcher = Prefetcher(self.sirius)
+        self.prefetcher.start()
+
+    def testWant(self):
+        self.prefetcher.want(['Octane ', 'nowhere', 'octane'])
+        self.sirius.done.wait(5)
+        self.assertEqual([name for (name, retry) in self.sirius.fetched],
+                         ['octane'])
+
+    def testQuiet(self):
+        self.prefetcher.want(['octane'])
+        self.sirius.done.wait(5)
+        retry = self.sirius.fetched[0][1]
+        self.assertEqual(retry.attempts, 1)
+        self.failIf(retry.verbose)
+        # Only the loaded lineup is used, typing never fetches it
+        self.failIf(True in self.sirius.loads)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+
+"""Tests of the retry policy"""
+
+import urllib2
+import unittest
+
+import support
+from Retry import RetryPolicy
+
+class RetryPolicyTest(unittest.TestCase):
+    def testWaitDoubles(self):
+        policy = RetryPolicy(delay=1, maxdelay=30, jitter=0)
+        self.assertEqual([policy.wait(a) for a in range(1, 7)],
+                         [1, 2, 4, 8, 16, 30])
+
+    def testWaitForever(self):
+        policy = RetryPolicy(attempts=0, delay=1, maxdelay=30, jitter=0)
+        self.assertEqual(policy.wait(5000), 30)
+
+    def testRetryable(self):
+        policy = RetryPolicy()
+        error = lambda code: urllib2.HTTPError('http://x', code, '', {}, None)
+        self.assert_(policy.retryable(urllib2.URLError('down')))
+        self.assert_(policy.retryable(error(503)))
+        self.failIf(policy.retryable(error(404)))
+        self.failIf(policy.retryable(ValueError()))
+
+    def testGivesUp(self):
+        policy = RetryPolicy(attempts=3, delay=0, jitter=0, verbose=False)
+        calls = []
+        def fail():
+            calls.append(1)
+            raise urllib2.URLError('down')
+        self.assertRaises(urllib2.URLError, policy.call, 'test', fail)
+        self.assertEqual(len(calls), 3)
+
+if __name__ == '__main__':
+    unittest.main()
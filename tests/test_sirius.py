@@ -0,0 +1,49 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+
+"""Tests of Sirius that don't go to the website"""
+
+import unittest
+
+import support
+from Sirius import Sirius
+
+class ConfigureTest(unittest.TestCase):
+    def setUp(self):
+        self.directories = [support.writeConfig({'retry_attempts': '3',
+                                                 'auth_probe_age': '60'})]
+        self.sirius = Sirius()
+
+    def tearDown(self):
+        for directory in self.directories:
+            support.removeConfig(directory)
+
+    def testReload(self):
+        self.assertEqual(self.sirius.retry.attempts, 3)
+        self.assertEqual(self.sirius.authcache.maxage, 60)
+        self.directories.append(support.writeConfig({'retry_attempts': '5',
+                                                     'bitrate': 'Low'}))
+        self.sirius.configure()
+        self.assertEqual(self.sirius.retry.attempts, 5)
+        self.assertEqual(self.sirius.authcache.maxage, 900)
+        self.assertEqual(self.sirius.settings.bitrate, 'Low')
+        self.assertEqual(self.sirius.provider.settings.bitrate, 'Low')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/python
+#Pyxis and Original Sipie: Sirius Command Line Player
+#Copyright (C) Corey Ling, Eli Criffield
+#
+#This program is free software; you can redistribute it and/or
+#modify it under the terms of the GNU General Public License
+#as published by the Free Software Foundation; either version 2
+#of the License, or (at your option) any later version.
+#
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+#
+#You should have received a copy of the GNU General Public License
+#along with this program; if not, write to the Free Software
+#Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+
+"""Tests of capturing a stream against a local stand-in server"""
+
+import os
+import struct
+import unittest
+
+import support
+from StreamCapture import StreamCapture, asfHeaderGuid, asfFilePropertiesGuid
+
+PACKETSIZE = 64
+
+def asfHeader():
+    """A header with a file properties object setting PACKETSIZE"""
+    properties = asfFilePropertiesGuid + struct.pack('<Q', 104) + \
+        '\0' * 16 + '\0' * 40 + '\0' * 8 + '\0' * 4 + \
+        struct.pack('<III', PACKETSIZE, PACKETSIZE, 32000)
+    return asfHeaderGuid + struct.pack('<QIBB', 30 + len(properties), 1, 1, 2) + \
+        properties
+
+def chunk(type, payload, sequence=0):
+    if type in 'HD':
+        payload = struct.pack('<IBBH', sequence, 0, 0, len(payload) + 8) + payload
+    return '$' + type + struct.pack('<H', len(payload)) + payload
+
+class CaptureTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = support.writeConfig()
+        self.filename = os.path.join(self.directory, 'capture.asf')
+        header = asfHeader()
+        packets = ['a' * PACKETSIZE, 'b' * 40]
+        framed = chunk('H', header[:50]) + chunk('H', header[50:]) + \
+            chunk('D', packets[0], 1) + chunk('C', '') + chunk('H', header) + \
+            chunk('D', packets[1], 2) + chunk('E', '') + chunk('D', 'late')
+        self.expected = header + packets[0] + packets[1] + \
+            '\0' * (PACKETSIZE - len(packets[1]))
+        self.server = support.StubServer({
+            '/stream': ('application/x-mms-framed', framed),
+            '/plain': ('video/x-ms-asf', self.expected),
+            })
+        self.server.routes['/listen.asx'] = ('video/x-ms-asf',
+            '<ASX version="3.0"><Entry><Ref href="%s/stream"/></Entry></ASX>' %
+            self.server.url)
+
+    def tearDown(self):
+        self.server.close()
+        support.removeConfig(self.directory)
+
+    def capture(self, url):
+        capture = StreamCapture(url, self.filename, timeout=5)
+        capture.start()
+        capture._StreamCapture__thread.join(10)
+        self.assertFalse(capture.running())
+        self.assertEqual(capture.error, None)
+        fd = open(self.filename, 'rb')
+        try:
+            return fd.read()
+        finally:
+            fd.close()
+
+    def testFramedStreamIsUnwrapped(self):
+        data = self.capture(self.server.url + '/stream')
+        self.assertTrue(data.startswith(asfHeaderGuid))
+        self.assertEqual(data, self.expected)
+
+    def testPlaylistIsFollowed(self):
+        data = self.capture(self.server.url + '/listen.asx')
+        self.assertTrue(data.startswith(asfHeaderGuid))
+
+    def testPlainStreamIsCopied(self):
+        self.assertEqual(self.capture(self.server.url + '/plain'), self.expected)
+
+if __name__ == '__main__':
+    unittest.main()